@@ -0,0 +1,172 @@
+"""
+On-disk caching of LLM responses.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import diskcache
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+from .config import CACHE_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """Exact-match cache of parsed LLM responses, persisted across runs"""
+
+    def __init__(self, name: str, directory: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Subdirectory for this cache (one per component)
+            directory: Root cache directory (default: from config)
+        """
+        self.path = Path(directory or CACHE_DIR) / name
+        self._cache = diskcache.Cache(str(self.path))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from everything that affects the LLM output"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache so far"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        value = self._cache.get(key, default=_MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a value under key"""
+        self._cache.set(key, value)
+
+    def clear(self):
+        """Drop all cached entries"""
+        self._cache.clear()
+
+    def close(self):
+        self._cache.close()
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache: returns the stored value of the most similar
+    previously seen text when cosine similarity clears a threshold.
+
+    Only suitable for outputs that are shared by near-identical documents
+    (e.g. the document type); extracted field values differ between them.
+    """
+
+    def __init__(self, name: str, directory: Optional[Path] = None,
+                 model_name: str = 'all-MiniLM-L6-v2', threshold: float = 0.95):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Subdirectory for this cache (one per component)
+            directory: Root cache directory (default: from config)
+            model_name: sentence-transformers embedding model
+            threshold: Minimum cosine similarity for a hit
+        """
+        if not SEMANTIC_CACHE_AVAILABLE:
+            raise ImportError("Semantic cache requires sentence-transformers, faiss-cpu and numpy")
+
+        self.path = Path(directory or CACHE_DIR) / name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        self.embedder = SentenceTransformer(model_name)
+        dim = self.embedder.get_sentence_embedding_dimension()
+        self.index = faiss.IndexFlatIP(dim)
+        self.payloads = []
+        self._load()
+
+    # Both files are append-only, one record per add(), so persisting an entry
+    # costs the same however large the cache has grown
+    @property
+    def _embeddings_path(self) -> Path:
+        return self.path / 'embeddings.f32'
+
+    @property
+    def _payloads_path(self) -> Path:
+        return self.path / 'payloads.jsonl'
+
+    def _load(self):
+        if not (self._embeddings_path.exists() and self._payloads_path.exists()):
+            return
+        embeddings = np.fromfile(self._embeddings_path, dtype='float32')
+        with open(self._payloads_path, 'r') as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+        if embeddings.size % self.index.d:
+            logger.warning(f"Ignoring inconsistent semantic cache at {self.path}")
+            return
+        embeddings = embeddings.reshape(-1, self.index.d)
+        # A crash between the two appends leaves one file a record ahead
+        count = min(len(embeddings), len(payloads))
+        self.index.add(embeddings[:count])
+        self.payloads = payloads[:count]
+
+    def _append(self, embedding, value: Any):
+        with open(self._embeddings_path, 'ab') as f:
+            f.write(np.ascontiguousarray(embedding, dtype='float32').tobytes())
+        with open(self._payloads_path, 'a') as f:
+            f.write(json.dumps(value) + '\n')
+
+    def embed(self, text: str):
+        """Return the normalized embedding of text, shaped (1, dim)"""
+        return self.embedder.encode([text], normalize_embeddings=True).astype('float32')
+
+    def lookup(self, embedding) -> Optional[Any]:
+        """Return the value stored for the nearest neighbour, or None on a miss"""
+        with self._lock:
+            if self.index.ntotal > 0:
+                scores, ids = self.index.search(embedding, 1)
+                if scores[0, 0] >= self.threshold:
+                    self.hits += 1
+                    return self.payloads[ids[0, 0]]
+            self.misses += 1
+            return None
+
+    def add(self, embedding, value: Any):
+        """Store a JSON-serializable value under embedding and persist it"""
+        # Write outside _lock so lookups don't wait on disk
+        with self._write_lock:
+            self._append(embedding, value)
+        with self._lock:
+            self.index.add(embedding)
+            self.payloads.append(value)
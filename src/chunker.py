@@ -0,0 +1,164 @@
+"""
+Section-aware chunking of document text.
+
+Prefill cost grows with prompt length, so long documents are split into
+~1000-token chunks along their headings and paragraphs, and LLM calls are
+sent only the chunks they need (the opening for classification, the opening
+plus the totals for extraction).
+"""
+
+import re
+from typing import List, Tuple
+
+from .prompts import count_tokens
+
+# Chunk size the packer aims for, and the most a single block (e.g. a table)
+# may reach before it's split line by line
+_TARGET_TOKENS = 1000
+_MAX_TOKENS = 1200
+
+# Chunks smaller than this are merged into their neighbour
+_MIN_TOKENS = 30
+
+# Share of the previous chunk repeated at the start of the next
+_OVERLAP = 0.05
+
+# Markdown headings, short ALL-CAPS lines and numbered section titles
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s+\S.*|[A-Z][A-Z0-9 &/,.'()-]{2,60}:?|\d+(?:\.\d+)*\.?\s+[A-Z][^.]{0,60})$")
+
+# Page furniture repeated on every page
+_BOILERPLATE_RE = re.compile(
+    r"^[ \t]*(?:page \d+(?: of \d+)?|\d+ ?/ ?\d+|confidential\b.*|printed on\b.*)[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Lines that signal totals and amounts, which extraction needs most
+_AMOUNT_RE = re.compile(r"[$€£]|\b(?:total|subtotal|amount|tax|balance)\b", re.IGNORECASE)
+
+
+def _blocks(text: str) -> List[str]:
+    """Paragraphs of text, with every heading starting a new one"""
+    blocks = []
+    current = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or _HEADING_RE.match(stripped):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not stripped:
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _split_lines(block: str, target_tokens: int) -> List[Tuple[str, int]]:
+    """Split an oversized block into pieces of whole lines near target_tokens"""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for line in block.splitlines():
+        tokens = count_tokens(line)
+        if current and current_tokens + tokens > target_tokens:
+            pieces.append(("\n".join(current), current_tokens))
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        pieces.append(("\n".join(current), current_tokens))
+    return pieces
+
+
+def chunk_text(text: str, target_tokens: int = _TARGET_TOKENS, max_tokens: int = _MAX_TOKENS,
+               min_tokens: int = _MIN_TOKENS, overlap: float = _OVERLAP) -> List[str]:
+    """
+    Split document text into chunks along headings and paragraphs.
+
+    Args:
+        text: Document text
+        target_tokens: Size chunks are packed up to
+        max_tokens: Largest block kept whole (tables, long paragraphs)
+        min_tokens: Chunks smaller than this are merged into the previous one
+        overlap: Fraction of each chunk repeated at the start of the next
+
+    Returns:
+        Chunks in document order (page boilerplate removed)
+    """
+    text = _BOILERPLATE_RE.sub("", text)
+
+    # Greedily pack whole blocks up to the target size
+    packed: List[Tuple[List[str], int]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for block in _blocks(text):
+        tokens = count_tokens(block)
+        pieces = [(block, tokens)] if tokens <= max_tokens else _split_lines(block, target_tokens)
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > target_tokens:
+                packed.append((current, current_tokens))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        packed.append((current, current_tokens))
+
+    # Fold fragments (a lone heading, a signature line) into their neighbour
+    merged: List[Tuple[List[str], int]] = []
+    for parts, tokens in packed:
+        if merged and (tokens < min_tokens or merged[-1][1] < min_tokens):
+            merged[-1] = (merged[-1][0] + parts, merged[-1][1] + tokens)
+        else:
+            merged.append((parts, tokens))
+
+    chunks = ["\n\n".join(parts) for parts, _ in merged]
+    if overlap <= 0 or len(chunks) < 2:
+        return chunks
+
+    # Repeat the end of each chunk so sentences cut at a boundary keep their context
+    overlapped = [chunks[0]]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        tail = previous[len(previous) - int(len(previous) * overlap):]
+        # Start the tail on a word boundary
+        tail = tail.split(None, 1)[1] if " " in tail.strip() else tail
+        overlapped.append(f"{tail}\n\n{chunk}" if tail.strip() else chunk)
+    return overlapped
+
+
+def first_chunk(text: str) -> str:
+    """
+    The opening chunk of a document, which is enough to tell its type.
+
+    Args:
+        text: Document text
+
+    Returns:
+        First chunk (empty for an empty document)
+    """
+    chunks = chunk_text(text, overlap=0)
+    return chunks[0] if chunks else ""
+
+
+def relevant_text(text: str, max_chunks: int = 2) -> str:
+    """
+    The parts of a document extraction needs: its opening chunk (parties,
+    numbers, dates) plus the chunks richest in amounts and totals.
+
+    Args:
+        text: Document text
+        max_chunks: Most chunks to keep
+
+    Returns:
+        text unchanged if it fits in max_chunks, else the selected chunks in document order
+    """
+    chunks = chunk_text(text, overlap=0)
+    if len(chunks) <= max_chunks:
+        return text
+
+    # Rank the rest by amount mentions; ties go to the later chunk (totals sit at the end)
+    ranked = sorted(range(1, len(chunks)), key=lambda i: (len(_AMOUNT_RE.findall(chunks[i])), i), reverse=True)
+    keep = sorted([0, *ranked[:max_chunks - 1]])
+    return "\n\n".join(chunks[i] for i in keep)
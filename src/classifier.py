@@ -3,32 +3,50 @@ Document classification module using Google Gemini API.
 """
 
 import google.generativeai as genai
-import json
+import asyncio
 import logging
-from typing import Dict, Tuple
-from pathlib import Path
-from .config import GEMINI_API_KEY, GEMINI_MODEL
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from .config import GEMINI_API_KEY, GEMINI_MODEL, BATCH_CONCURRENCY
+from .cache import ResponseCache, SemanticCache, SEMANTIC_CACHE_AVAILABLE
+from .parsing import extract_json
+from .prompts import render_prompt, split_template, CLASSIFICATION_PROMPT_FILE, load_prompt_file
+from .event_loop import get_background_loop
+from .gemini import configure_gemini
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keyword fallback for responses without JSON, in order of precedence
+_FALLBACK_TYPES = {
+    'invoice': 'invoice',
+    'contract': 'contract',
+    'email': 'email',
+    'meeting': 'meeting_minutes',
+}
+_FALLBACK_RE = re.compile('|'.join(_FALLBACK_TYPES), re.IGNORECASE)
+
 
 class DocumentClassifier:
     """Classifies documents using Google Gemini API"""
 
-    def __init__(self, model_name: str = None, api_key: str = None):
+    def __init__(self, model_name: str = None, api_key: str = None, use_cache: bool = True,
+                 semantic_cache: bool = False):
         """
         Initialize the DocumentClassifier with Gemini API.
 
         Args:
             model_name: Gemini model to use (default: from config)
             api_key: Gemini API key (default: from config)
+            use_cache: Reuse cached responses for identical prompts
+            semantic_cache: Also reuse classifications of near-duplicate documents
+                (requires sentence-transformers and faiss)
         """
         self.model_name = model_name or GEMINI_MODEL
         self.api_key = api_key or GEMINI_API_KEY
 
         # Configure Gemini API
-        genai.configure(api_key=self.api_key)
+        configure_gemini(self.api_key)
         # Ensure model name doesn't have 'models/' prefix
         model_id = self.model_name.replace('models/', '')
         self.model = genai.GenerativeModel(model_id)
@@ -36,12 +54,21 @@ class DocumentClassifier:
         # Load classification prompt
         self.prompt_template = self._load_prompt_template()
 
+        # Exact-prompt response cache
+        self.cache = ResponseCache('llm_classifier') if use_cache else None
+
+        # Embedding-similarity cache consulted on exact-cache misses
+        self.semantic_cache = None
+        if semantic_cache and SEMANTIC_CACHE_AVAILABLE:
+            self.semantic_cache = SemanticCache('semantic_classifier')
+        elif semantic_cache:
+            logger.warning("Semantic cache not available. Install: pip install sentence-transformers faiss-cpu")
+
     def _load_prompt_template(self) -> str:
         """Load classification prompt template"""
-        prompt_path = Path("prompts/classification.txt")
-        if prompt_path.exists():
-            with open(prompt_path, 'r') as f:
-                return f.read()
+        prompt = load_prompt_file(CLASSIFICATION_PROMPT_FILE)
+        if prompt is not None:
+            return prompt
         else:
             # Default prompt if file doesn't exist yet
             return """You are a document classifier for a legal and business analytics firm. Your task is to classify legitimate business documents for data processing purposes.
@@ -63,6 +90,90 @@ Respond ONLY with a JSON object in this exact format:
 
 Valid types are: invoice, contract, email, meeting_minutes"""
 
+    def _text_sample(self, text: str) -> str:
+        # Truncate text if too long (keep first 3000 chars for classification)
+        return text[:3000]
+
+    def _build_prompt(self, text: str) -> str:
+        """Build the classification prompt for a document"""
+        return render_prompt(self.prompt_template, self._text_sample(text))
+
+    def _request_options(self) -> Dict:
+        """Generation config and safety settings for classification calls"""
+        generation_config = genai.GenerationConfig(
+            temperature=0.1,  # Low temperature for consistent classification
+            top_p=1,
+            top_k=1,
+            max_output_tokens=512,
+        )
+
+        # Configure safety settings to be less restrictive
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        safety_settings = {
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        }
+
+        return {'generation_config': generation_config, 'safety_settings': safety_settings}
+
+    def _cache_key(self, prompt: str) -> str:
+        return ResponseCache.make_key(self.model_name, prompt)
+
+    def _cache_lookup(self, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return a cached classification for this exact prompt, if any"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(prompt))
+
+    def _cache_store(self, prompt: str, result: Tuple[str, float]):
+        """Cache a classification (failed calls are not cached)"""
+        if self.cache is not None and result[0] != 'unknown':
+            self.cache.set(self._cache_key(prompt), result)
+
+    def _semantic_lookup(self, text: str):
+        """
+        Look up a near-duplicate document in the semantic cache.
+
+        Returns:
+            Tuple of (cached classification or None, embedding to store on a miss)
+        """
+        if self.semantic_cache is None:
+            return None, None
+        embedding = self.semantic_cache.embed(self._text_sample(text))
+        cached = self.semantic_cache.lookup(embedding)
+        return (tuple(cached) if cached is not None else None), embedding
+
+    def _semantic_store(self, embedding, result: Tuple[str, float]):
+        if embedding is not None and result[0] != 'unknown':
+            self.semantic_cache.add(embedding, list(result))
+
+    def _handle_response(self, response) -> Tuple[str, float]:
+        """Turn a Gemini response into (document_type, confidence_score)"""
+        # Check if response was blocked
+        if not response.candidates:
+            logger.error(f"Response blocked by safety filters")
+            return "unknown", 0.0
+
+        # Try to get text from response
+        try:
+            if response.text:
+                response_text = response.text
+
+                # Parse the JSON response
+                classification = self._parse_classification_response(response_text)
+
+                logger.info("Classification: %s (confidence: %.2f)", classification['type'], classification['confidence'])
+                return classification['type'], classification['confidence']
+        except ValueError as e:
+            logger.error(f"Response blocked or empty: {str(e)}")
+            return "unknown", 0.0
+
+        logger.error("Empty response from Gemini API")
+        return "unknown", 0.0
+
     def classify(self, text: str) -> Tuple[str, float]:
         """
         Classify a document based on its text content.
@@ -73,74 +184,165 @@ Valid types are: invoice, contract, email, meeting_minutes"""
         Returns:
             Tuple of (document_type, confidence_score)
         """
-        # Truncate text if too long (keep first 3000 chars for classification)
-        text_sample = text[:3000] if len(text) > 3000 else text
+        prompt = self._build_prompt(text)
+
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
 
-        # Create the prompt
-        prompt = self.prompt_template.format(text=text_sample)
+        cached, embedding = self._semantic_lookup(text)
+        if cached is not None:
+            self._cache_store(prompt, cached)
+            return cached
 
         try:
             # Call Gemini API
-            generation_config = genai.GenerationConfig(
-                temperature=0.1,  # Low temperature for consistent classification
-                top_p=1,
-                top_k=1,
-                max_output_tokens=512,
-            )
-
-            # Configure safety settings to be less restrictive
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-
-            # Check if response was blocked
-            if not response.candidates:
-                logger.error(f"Response blocked by safety filters")
-                return "unknown", 0.0
-
-            # Try to get text from response
-            try:
-                if response.text:
-                    response_text = response.text
+            response = self.model.generate_content(prompt, **self._request_options())
+            result = self._handle_response(response)
+            self._cache_store(prompt, result)
+            self._semantic_store(embedding, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Error during classification: {str(e)}")
+            return "unknown", 0.0
 
-                    # Parse the JSON response
-                    classification = self._parse_classification_response(response_text)
+    async def awarm_up(self) -> bool:
+        """
+        Open the Gemini connection before the first document is timed.
 
-                    logger.info(f"Classification: {classification['type']} (confidence: {classification['confidence']:.2f})")
-                    return classification['type'], classification['confidence']
-            except ValueError as e:
-                logger.error(f"Response blocked or empty: {str(e)}")
-                return "unknown", 0.0
+        count_tokens is a round-trip that generates nothing, so it pays the
+        channel setup without spending output tokens. The extractor shares
+        the same channel, so this warms it too.
 
-            logger.error("Empty response from Gemini API")
-            return "unknown", 0.0
+        Returns:
+            True if the request succeeded
+        """
+        return await get_background_loop().submit(self._awarm_up())
+
+    async def _awarm_up(self) -> bool:
+        try:
+            await self.model.count_tokens_async("ok")
+            return True
+        except Exception as e:
+            logger.warning(f"Gemini warmup failed: {str(e)}")
+            return False
+
+    async def aclassify(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a document without blocking the event loop.
+
+        Args:
+            text: The document text to classify
+
+        Returns:
+            Tuple of (document_type, confidence_score)
+        """
+        return await get_background_loop().submit(self._aclassify(text))
+
+    async def _aclassify(self, text: str) -> Tuple[str, float]:
+        prompt = self._build_prompt(text)
+
+        cached = self._cache_lookup(prompt)
+        if cached is not None:
+            return cached
+
+        # Embedding is CPU-bound; keep it off the event loop
+        cached, embedding = await asyncio.to_thread(self._semantic_lookup, text)
+        if cached is not None:
+            self._cache_store(prompt, cached)
+            return cached
+
+        try:
+            response = await self.model.generate_content_async(prompt, **self._request_options())
+            result = self._handle_response(response)
+            self._cache_store(prompt, result)
+            self._semantic_store(embedding, result)
+            return result
 
         except Exception as e:
             logger.error(f"Error during classification: {str(e)}")
             return "unknown", 0.0
 
+    def _build_combined_prompt(self, text: str, extraction_prompts: Dict[str, str]) -> str:
+        """Build a single prompt that classifies and extracts in one call"""
+        # Reuse the field instructions that follow {text} in each extraction template
+        schemas = "\n\n".join(
+            f"### If the document is {doc_type.upper()}:\n{split_template(template)[-1].strip()}"
+            for doc_type, template in extraction_prompts.items()
+        )
+        types = ", ".join(extraction_prompts)
+        return (
+            f"You are processing legitimate business documents. First classify the document as one of: {types}. "
+            "Then extract the fields for that type ONLY, following the matching instructions below.\n\n"
+            f"DOCUMENT TEXT:\n{text}\n\n"
+            f"{schemas}\n\n"
+            "Respond ONLY with a JSON object in this exact format, placing the matching "
+            "type's fields object under \"fields\":\n"
+            '{"type": "invoice", "confidence": 0.95, "fields": { ...fields for that type... }}'
+        )
+
+    def classify_and_extract(self, text: str, extractor=None,
+                             min_confidence: float = 0.7) -> Tuple[str, float, Dict[str, Any]]:
+        """
+        Classify a document and extract its fields in a single LLM call.
+
+        Falls back to the two-step classify() + extract() path when the combined
+        response can't be parsed or its confidence is below min_confidence.
+
+        Args:
+            text: The document text
+            extractor: FieldExtractor providing extraction prompts and the fallback
+                (default: one built with this classifier's model and key)
+            min_confidence: Lowest combined-call confidence accepted without falling back
+
+        Returns:
+            Tuple of (document_type, confidence_score, extracted_fields)
+        """
+        if extractor is None:
+            from .extractor import FieldExtractor
+            extractor = FieldExtractor(self.model_name, self.api_key, use_cache=self.cache is not None)
+
+        prompt = self._build_combined_prompt(text, extractor.prompts)
+        cache_key = ResponseCache.make_key(self.model_name, 'classify_and_extract', prompt)
+
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.model.generate_content(prompt, **extractor._request_options())
+            result = extract_json(response.text) if response.candidates else None
+        except Exception as e:
+            logger.error(f"Error during combined classification/extraction: {str(e)}")
+            result = None
+
+        if result is not None:
+            doc_type = str(result.get('type', 'unknown')).lower()
+            try:
+                confidence = max(0.0, min(1.0, float(result.get('confidence', 0.5))))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            fields = result.get('fields')
+
+            if doc_type in extractor.prompts and isinstance(fields, dict) and confidence >= min_confidence:
+                logger.info("Classification: %s (confidence: %.2f), extracted %d fields in one call",
+                            doc_type, confidence, len(fields))
+                if self.cache is not None:
+                    self.cache.set(cache_key, (doc_type, confidence, fields))
+                return doc_type, confidence, fields
+
+        logger.info("Combined call inconclusive, falling back to separate classification and extraction")
+        doc_type, confidence = self.classify(text)
+        fields = extractor.extract(text, doc_type) if doc_type in extractor.prompts else {}
+        return doc_type, confidence, fields
+
     def _parse_classification_response(self, response_text: str) -> Dict:
         """Parse the LLM response to extract classification"""
         try:
-            # Try to find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                result = json.loads(json_str)
+            result = extract_json(response_text)
 
+            if result is not None:
                 # Validate and normalize
                 doc_type = result.get('type', 'unknown').lower()
                 confidence = float(result.get('confidence', 0.5))
@@ -150,37 +352,80 @@ Valid types are: invoice, contract, email, meeting_minutes"""
 
                 return {'type': doc_type, 'confidence': confidence}
             else:
-                # Fallback: look for keywords in response
-                response_lower = response_text.lower()
-                if 'invoice' in response_lower:
-                    return {'type': 'invoice', 'confidence': 0.7}
-                elif 'contract' in response_lower:
-                    return {'type': 'contract', 'confidence': 0.7}
-                elif 'email' in response_lower:
-                    return {'type': 'email', 'confidence': 0.7}
-                elif 'meeting' in response_lower:
-                    return {'type': 'meeting_minutes', 'confidence': 0.7}
-                else:
-                    return {'type': 'unknown', 'confidence': 0.5}
+                # Fallback: look for keywords in response (single regex pass,
+                # earlier keywords in _FALLBACK_TYPES take precedence)
+                found = {match.lower() for match in _FALLBACK_RE.findall(response_text)}
+                for keyword, doc_type in _FALLBACK_TYPES.items():
+                    if keyword in found:
+                        return {'type': doc_type, 'confidence': 0.7}
+                return {'type': 'unknown', 'confidence': 0.5}
 
         except Exception as e:
             logger.error(f"Error parsing classification response: {str(e)}")
             return {'type': 'unknown', 'confidence': 0.0}
 
-    def batch_classify(self, documents: list) -> list:
+    def batch_classify(self, documents: list, concurrency: int = BATCH_CONCURRENCY) -> list:
         """
         Classify multiple documents.
 
         Args:
             documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of in-flight API calls
 
         Returns:
             List of tuples (document_type, confidence_score)
         """
-        results = []
-        for i, doc in enumerate(documents, 1):
-            logger.info(f"Classifying document {i}/{len(documents)}")
-            doc_type, confidence = self.classify(doc.get('text', ''))
-            results.append((doc_type, confidence))
+        return get_background_loop().run(self.abatch_classify(documents, concurrency))
 
-        return results
+    async def abatch_classify(self, documents: list, concurrency: int = BATCH_CONCURRENCY) -> list:
+        """
+        Classify multiple documents concurrently.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of in-flight API calls
+
+        Returns:
+            List of tuples (document_type, confidence_score), in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        # Progress every ~1% of the batch rather than every document
+        log_every = max(1, len(documents) // 100)
+
+        async def _run(i: int, doc: Dict) -> Tuple[str, float]:
+            async with semaphore:
+                if i % log_every == 0 or i == len(documents):
+                    logger.info("Classifying document %d/%d", i, len(documents))
+                return await self.aclassify(doc.get('text', ''))
+
+        return list(await asyncio.gather(*[_run(i, doc) for i, doc in enumerate(documents, 1)]))
+
+    async def aiter_classify(self, documents: list,
+                             concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Tuple[int, Tuple[str, float]]]:
+        """
+        Classify multiple documents, yielding each result as soon as it's ready.
+
+        Lets downstream work (e.g. extraction) start on early documents while
+        the rest are still being classified.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of in-flight API calls
+
+        Yields:
+            Tuples of (index into documents, (document_type, confidence_score)), in completion order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(i: int, doc: Dict) -> Tuple[int, Tuple[str, float]]:
+            async with semaphore:
+                return i, await self.aclassify(doc.get('text', ''))
+
+        tasks = [asyncio.create_task(_run(i, doc)) for i, doc in enumerate(documents)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early: don't leave calls running in the background
+            for task in tasks:
+                task.cancel()
@@ -2,10 +2,13 @@
 Document classification using multi-model orchestration.
 """
 
+import asyncio
 import logging
-from typing import Tuple
-from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
 
+from .prompts import CLASSIFICATION_PROMPT_FILE, load_prompt_file
+from .config import BATCH_CONCURRENCY
+from .event_loop import get_background_loop
 from .orchestrator import LLMOrchestrator
 
 logging.basicConfig(level=logging.INFO)
@@ -15,16 +18,28 @@ logger = logging.getLogger(__name__)
 class DocumentClassifier:
     """Classifies documents using orchestrated multi-model approach"""
 
-    def __init__(self):
-        self.orchestrator = LLMOrchestrator()
+    def __init__(self, use_cache: bool = True, orchestrator: Optional[LLMOrchestrator] = None):
+        """
+        Args:
+            use_cache: Reuse cached responses for identical inputs (only applies
+                to the orchestrator created here, not one passed in)
+            orchestrator: Shared orchestrator, so the classifier and extractor can
+                reuse one set of clients and connection pools (default: a new one)
+        """
+        self._owns_orchestrator = orchestrator is None
+        self.orchestrator = orchestrator or LLMOrchestrator(use_cache=use_cache)
         self.prompt_template = self._load_prompt_template()
 
+    def close(self):
+        """Release the orchestrator's pooled connections (unless it was passed in)"""
+        if self._owns_orchestrator:
+            self.orchestrator.close()
+
     def _load_prompt_template(self) -> str:
         """Load classification prompt template"""
-        prompt_path = Path("prompts/classification.txt")
-        if prompt_path.exists():
-            with open(prompt_path, 'r') as f:
-                return f.read()
+        prompt = load_prompt_file(CLASSIFICATION_PROMPT_FILE)
+        if prompt is not None:
+            return prompt
         else:
             return """You are a document classifier for a legal and business analytics firm. Your task is to classify legitimate business documents for data processing purposes.
 
@@ -55,32 +70,114 @@ Valid types are: invoice, contract, email, meeting_minutes"""
         Returns:
             Tuple of (document_type, confidence_score)
         """
-        # Truncate text if too long
-        text_sample = text[:3000] if len(text) > 3000 else text
+        return get_background_loop().run(self.aclassify(text))
+
+    async def aclassify(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a document without blocking the event loop.
 
+        Args:
+            text: The document text to classify
+
+        Returns:
+            Tuple of (document_type, confidence_score)
+        """
         # Use orchestrator to classify with fallback
-        doc_type, confidence, provider = self.orchestrator.classify_with_fallback(
-            text_sample,
+        doc_type, confidence, provider = await self.orchestrator.aclassify_with_fallback(
+            text,
             self.prompt_template
         )
 
-        logger.info(f"Classification: {doc_type} ({confidence:.1%}) via {provider}")
+        logger.info("Classification: %s (%.1f%%) via %s", doc_type, confidence * 100, provider)
         return doc_type, confidence
 
-    def batch_classify(self, documents: list) -> list:
+    def batch_classify(self, documents: list, concurrency: int = BATCH_CONCURRENCY) -> list:
         """
         Classify multiple documents.
 
         Args:
             documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of documents classified at once
 
         Returns:
             List of tuples (document_type, confidence_score)
         """
+        return get_background_loop().run(self.abatch_classify(documents, concurrency))
+
+    async def abatch_classify(self, documents: list, concurrency: int = BATCH_CONCURRENCY) -> list:
+        """
+        Classify multiple documents concurrently.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of documents classified at once
+
+        Returns:
+            List of tuples (document_type, confidence_score), in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        # Progress every ~1% of the batch rather than every document
+        log_every = max(1, len(documents) // 100)
+
+        async def _run(i: int, doc: dict) -> Tuple[str, float]:
+            async with semaphore:
+                if i % log_every == 0 or i == len(documents):
+                    logger.info("Classifying document %d/%d", i, len(documents))
+                return await self.aclassify(doc.get('text', ''))
+
+        return list(await asyncio.gather(*[_run(i, doc) for i, doc in enumerate(documents, 1)]))
+
+    async def aiter_classify(self, documents: list,
+                             concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Tuple[int, Tuple[str, float]]]:
+        """
+        Classify multiple documents, yielding each result as soon as it's ready.
+
+        Lets downstream work (e.g. extraction) start on early documents while
+        the rest are still being classified.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            concurrency: Maximum number of documents classified at once
+
+        Yields:
+            Tuples of (index into documents, (document_type, confidence_score)), in completion order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(i: int, doc: dict) -> Tuple[int, Tuple[str, float]]:
+            async with semaphore:
+                return i, await self.aclassify(doc.get('text', ''))
+
+        tasks = [asyncio.create_task(_run(i, doc)) for i, doc in enumerate(documents)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early: don't leave calls running in the background
+            for task in tasks:
+                task.cancel()
+
+    def batch_classify_packed(self, documents: list, pack_size: int = 4) -> list:
+        """
+        Classify multiple documents, packing several into each Ollama call.
+
+        Documents the packed call can't classify (provider unavailable,
+        misaligned reply, failed validation) fall back to classify().
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            pack_size: Documents per packed request
+
+        Returns:
+            List of tuples (document_type, confidence_score), in input order
+        """
         results = []
-        for i, doc in enumerate(documents, 1):
-            logger.info(f"Classifying document {i}/{len(documents)}")
-            doc_type, confidence = self.classify(doc.get('text', ''))
-            results.append((doc_type, confidence))
+        for start in range(0, len(documents), pack_size):
+            texts = [doc.get('text', '') for doc in documents[start:start + pack_size]]
+            logger.info("Classifying documents %d-%d/%d (packed)", start + 1, start + len(texts), len(documents))
+
+            packed = self.orchestrator.classify_packed(texts) or [None] * len(texts)
+            for text, result in zip(texts, packed):
+                results.append(result if result is not None else self.classify(text))
 
         return results
@@ -21,6 +21,10 @@ OPENAI_MODEL = "gpt-4o"  # Best OpenAI model for structured extraction
 # Ollama Configuration (local)
 OLLAMA_MODEL = "qwen2.5:7b"
 OLLAMA_URL = "http://localhost:11434"
+# Keep the model (and its prompt-prefix KV cache) loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Classification replies are a ~20-token JSON object; cap decoding accordingly
+OLLAMA_CLASSIFY_OPTIONS = {"temperature": 0.1, "num_predict": 32, "top_k": 5, "top_p": 0.9}
 
 # Multi-model orchestration configuration
 MODEL_PRIORITY = [
@@ -31,3 +35,12 @@ MODEL_PRIORITY = [
 
 # Default model provider
 DEFAULT_PROVIDER = "openai"
+
+# Concurrent LLM requests per batch (match OLLAMA_NUM_PARALLEL for local models)
+BATCH_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+# On-disk cache for LLM responses
+CACHE_DIR = Path(__file__).parent.parent / '.cache'
+
+# Ensemble extraction results kept for DSPy prompt optimization (JSON Lines)
+EXTRACTION_HISTORY_FILE = CACHE_DIR / 'extraction_history.jsonl'
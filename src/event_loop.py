@@ -0,0 +1,69 @@
+"""
+Shared background event loop for async LLM calls.
+
+Async SDK clients (grpc.aio for Gemini, httpx for OpenAI/Ollama) bind their
+connection pools to the event loop they were first used on. Running every
+coroutine on one long-lived loop lets the sync wrappers and any caller's own
+event loop (scripts, Jupyter) share the same pooled clients safely.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """Event loop running forever in a daemon thread"""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="doc-intel-event-loop",
+            daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the background loop and block for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait before giving up (default: no limit)
+
+        Returns:
+            The coroutine's return value
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundLoop.run() called from the loop thread; await submit() instead")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def submit(self, coro: Awaitable) -> Any:
+        """Await a coroutine on the background loop from any other event loop"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+
+_shared_loop: Optional[BackgroundLoop] = None
+_shared_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return the process-wide background loop, starting it on first use"""
+    global _shared_loop
+    if _shared_loop is None:
+        with _shared_lock:
+            if _shared_loop is None:
+                _shared_loop = BackgroundLoop()
+    return _shared_loop
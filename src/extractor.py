@@ -3,11 +3,15 @@ Field extraction module using Google Gemini API.
 """
 
 import google.generativeai as genai
-import json
+import asyncio
 import logging
-from typing import Dict, Any
-from pathlib import Path
-from .config import GEMINI_API_KEY, GEMINI_MODEL
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+from .config import GEMINI_API_KEY, GEMINI_MODEL, BATCH_CONCURRENCY
+from .cache import ResponseCache
+from .parsing import extract_json
+from .prompts import render_prompt, load_extraction_prompt_files
+from .event_loop import get_background_loop
+from .gemini import configure_gemini
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,19 +20,20 @@ logger = logging.getLogger(__name__)
 class FieldExtractor:
     """Extracts structured fields from documents using Google Gemini API"""
 
-    def __init__(self, model_name: str = None, api_key: str = None):
+    def __init__(self, model_name: str = None, api_key: str = None, use_cache: bool = True):
         """
         Initialize the FieldExtractor with Gemini API.
 
         Args:
             model_name: Gemini model to use (default: from config)
             api_key: Gemini API key (default: from config)
+            use_cache: Reuse cached responses for identical prompts
         """
         self.model_name = model_name or GEMINI_MODEL
         self.api_key = api_key or GEMINI_API_KEY
 
         # Configure Gemini API
-        genai.configure(api_key=self.api_key)
+        configure_gemini(self.api_key)
         # Ensure model name doesn't have 'models/' prefix
         model_id = self.model_name.replace('models/', '')
         self.model = genai.GenerativeModel(model_id)
@@ -36,26 +41,16 @@ class FieldExtractor:
         # Load extraction prompts
         self.prompts = self._load_prompts()
 
+        # Exact-prompt response cache
+        self.cache = ResponseCache('llm_extractor') if use_cache else None
+
     def _load_prompts(self) -> Dict[str, str]:
         """Load extraction prompts for each document type"""
-        prompts = {}
-        prompt_files = {
-            'invoice': 'prompts/invoice_extraction.txt',
-            'contract': 'prompts/contract_extraction.txt',
-            'email': 'prompts/email_extraction.txt',
-            'meeting_minutes': 'prompts/meeting_extraction.txt'
+        return {
+            doc_type: prompt if prompt is not None else self._get_default_prompt(doc_type)
+            for doc_type, prompt in load_extraction_prompt_files().items()
         }
 
-        for doc_type, file_path in prompt_files.items():
-            path = Path(file_path)
-            if path.exists():
-                with open(path, 'r') as f:
-                    prompts[doc_type] = f.read()
-            else:
-                prompts[doc_type] = self._get_default_prompt(doc_type)
-
-        return prompts
-
     def _get_default_prompt(self, doc_type: str) -> str:
         """Get default extraction prompt for document type"""
         if doc_type == 'invoice':
@@ -137,6 +132,71 @@ Extract and return ONLY a JSON object with these fields:
 
 If a field is not found, use null or empty array."""
 
+    def _request_options(self) -> Dict[str, Any]:
+        """Generation config and safety settings for extraction calls"""
+        generation_config = genai.GenerationConfig(
+            temperature=0.2,  # Low temperature for consistent extraction
+            top_p=1,
+            top_k=1,
+            max_output_tokens=2048,
+        )
+
+        # Configure safety settings to be less restrictive
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        safety_settings = {
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        }
+
+        return {'generation_config': generation_config, 'safety_settings': safety_settings}
+
+    def _cache_key(self, prompt: str, doc_type: str) -> str:
+        return ResponseCache.make_key(self.model_name, doc_type, prompt)
+
+    def _cache_lookup(self, prompt: str, doc_type: str) -> Optional[Dict[str, Any]]:
+        """Return cached fields for this exact prompt, if any"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(prompt, doc_type))
+
+    def _cache_store(self, prompt: str, doc_type: str, extracted_data: Dict[str, Any]):
+        """Cache extracted fields (empty results are not cached)"""
+        if self.cache is not None and extracted_data:
+            self.cache.set(self._cache_key(prompt, doc_type), extracted_data)
+
+    def _handle_response(self, response, doc_type: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Turn a Gemini response into a dictionary of extracted fields.
+
+        Returns:
+            Tuple of (extracted fields, whether they came from a valid JSON
+            reply and may be cached)
+        """
+        # Check if response was blocked
+        if not response.candidates:
+            logger.error(f"Response blocked by safety filters")
+            return {}, False
+
+        # Try to get text from response
+        try:
+            if response.text:
+                response_text = response.text
+
+                # Parse the JSON response
+                extracted_data, parsed = self._parse_extraction_response(response_text)
+
+                logger.info("Extracted %d fields from %s", len(extracted_data), doc_type)
+                return extracted_data, parsed
+        except ValueError as e:
+            logger.error(f"Response blocked or empty: {str(e)}")
+            return {}, False
+
+        logger.error("Empty response from Gemini API")
+        return {}, False
+
     def extract(self, text: str, doc_type: str) -> Dict[str, Any]:
         """
         Extract structured fields from document text.
@@ -155,81 +215,85 @@ If a field is not found, use null or empty array."""
             return {}
 
         # Create the prompt
-        prompt = prompt_template.format(text=text)
+        prompt = render_prompt(prompt_template, text)
+
+        cached = self._cache_lookup(prompt, doc_type)
+        if cached is not None:
+            return cached
 
         try:
             # Call Gemini API
-            generation_config = genai.GenerationConfig(
-                temperature=0.2,  # Low temperature for consistent extraction
-                top_p=1,
-                top_k=1,
-                max_output_tokens=2048,
-            )
-
-            # Configure safety settings to be less restrictive
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-
-            # Check if response was blocked
-            if not response.candidates:
-                logger.error(f"Response blocked by safety filters")
-                return {}
-
-            # Try to get text from response
-            try:
-                if response.text:
-                    response_text = response.text
-
-                    # Parse the JSON response
-                    extracted_data = self._parse_extraction_response(response_text)
-
-                    logger.info(f"Extracted {len(extracted_data)} fields from {doc_type}")
-                    return extracted_data
-            except ValueError as e:
-                logger.error(f"Response blocked or empty: {str(e)}")
-                return {}
-
-            logger.error("Empty response from Gemini API")
+            response = self.model.generate_content(prompt, **self._request_options())
+            extracted_data, parsed = self._handle_response(response, doc_type)
+            # Best-effort fallback parses of malformed replies are retried next run
+            if parsed:
+                self._cache_store(prompt, doc_type, extracted_data)
+            return extracted_data
+
+        except Exception as e:
+            logger.error(f"Error during extraction: {str(e)}")
             return {}
 
+    async def aextract(self, text: str, doc_type: str) -> Dict[str, Any]:
+        """
+        Extract structured fields without blocking the event loop.
+
+        Args:
+            text: The document text
+            doc_type: The document type (invoice, contract, email, meeting_minutes)
+
+        Returns:
+            Dictionary of extracted fields
+        """
+        return await get_background_loop().submit(self._aextract(text, doc_type))
+
+    async def _aextract(self, text: str, doc_type: str) -> Dict[str, Any]:
+        prompt_template = self.prompts.get(doc_type)
+        if not prompt_template:
+            logger.error(f"No prompt found for document type: {doc_type}")
+            return {}
+
+        prompt = render_prompt(prompt_template, text)
+
+        cached = self._cache_lookup(prompt, doc_type)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.model.generate_content_async(prompt, **self._request_options())
+            extracted_data, parsed = self._handle_response(response, doc_type)
+            # Best-effort fallback parses of malformed replies are retried next run
+            if parsed:
+                self._cache_store(prompt, doc_type, extracted_data)
+            return extracted_data
+
         except Exception as e:
             logger.error(f"Error during extraction: {str(e)}")
             return {}
 
-    def _parse_extraction_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse the LLM response to extract structured data"""
+    def _parse_extraction_response(self, response_text: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parse the LLM response to extract structured data.
+
+        Returns:
+            Tuple of (extracted fields, whether they were parsed from valid JSON
+            rather than recovered by _fallback_parse)
+        """
         try:
-            # Try to find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                result = json.loads(json_str)
-                return result
-            else:
+            result = extract_json(response_text)
+            if result is not None:
+                return result, True
+
+            if '{' not in response_text:
                 logger.warning("No JSON found in extraction response")
-                return {}
+                return {}, False
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON from response: {str(e)}")
+            logger.error("Error parsing JSON from response")
             # Try to extract partial data
-            return self._fallback_parse(response_text)
+            return self._fallback_parse(response_text), False
         except Exception as e:
             logger.error(f"Error parsing extraction response: {str(e)}")
-            return {}
+            return {}, False
 
     def _fallback_parse(self, response_text: str) -> Dict[str, Any]:
         """Attempt to extract data even if JSON parsing fails"""
@@ -248,21 +312,72 @@ If a field is not found, use null or empty array."""
 
         return data
 
-    def batch_extract(self, documents: list, doc_types: list) -> list:
+    def batch_extract(self, documents: list, doc_types: list, concurrency: int = BATCH_CONCURRENCY) -> list:
         """
         Extract fields from multiple documents.
 
         Args:
             documents: List of document dictionaries with 'text' field
             doc_types: List of document types corresponding to each document
+            concurrency: Maximum number of in-flight API calls
 
         Returns:
             List of extracted field dictionaries
         """
-        results = []
-        for i, (doc, doc_type) in enumerate(zip(documents, doc_types), 1):
-            logger.info(f"Extracting fields from document {i}/{len(documents)} ({doc_type})")
-            extracted = self.extract(doc.get('text', ''), doc_type)
-            results.append(extracted)
+        return get_background_loop().run(self.abatch_extract(documents, doc_types, concurrency))
+
+    async def abatch_extract(self, documents: list, doc_types: list, concurrency: int = BATCH_CONCURRENCY) -> list:
+        """
+        Extract fields from multiple documents concurrently.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            doc_types: List of document types corresponding to each document
+            concurrency: Maximum number of in-flight API calls
+
+        Returns:
+            List of extracted field dictionaries, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        # Progress every ~1% of the batch rather than every document
+        log_every = max(1, len(documents) // 100)
+
+        async def _run(i: int, doc: Dict, doc_type: str) -> Dict[str, Any]:
+            async with semaphore:
+                if i % log_every == 0 or i == len(documents):
+                    logger.info("Extracting fields from document %d/%d (%s)", i, len(documents), doc_type)
+                return await self.aextract(doc.get('text', ''), doc_type)
+
+        return list(await asyncio.gather(*[
+            _run(i, doc, doc_type)
+            for i, (doc, doc_type) in enumerate(zip(documents, doc_types), 1)
+        ]))
+
+    async def aiter_extract(self, documents: list, doc_types: list,
+                            concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Extract fields from multiple documents, yielding each result as soon as it's ready.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            doc_types: List of document types (same order as documents)
+            concurrency: Maximum number of in-flight API calls
 
-        return results
+        Yields:
+            Tuples of (index into documents, extracted field dictionary), in completion order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(i: int, doc: Dict, doc_type: str) -> Tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                return i, await self.aextract(doc.get('text', ''), doc_type)
+
+        tasks = [asyncio.create_task(_run(i, doc, doc_type))
+                 for i, (doc, doc_type) in enumerate(zip(documents, doc_types))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early: don't leave calls running in the background
+            for task in tasks:
+                task.cancel()
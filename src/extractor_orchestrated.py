@@ -2,10 +2,13 @@
 Field extraction using multi-model orchestration.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
-from pathlib import Path
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
+from .prompts import load_extraction_prompt_files
+from .config import BATCH_CONCURRENCY
+from .event_loop import get_background_loop
 from .orchestrator import LLMOrchestrator
 
 logging.basicConfig(level=logging.INFO)
@@ -15,30 +18,30 @@ logger = logging.getLogger(__name__)
 class FieldExtractor:
     """Extracts structured fields using orchestrated multi-model approach"""
 
-    def __init__(self):
-        self.orchestrator = LLMOrchestrator()
+    def __init__(self, use_cache: bool = True, orchestrator: Optional[LLMOrchestrator] = None):
+        """
+        Args:
+            use_cache: Reuse cached responses for identical inputs (only applies
+                to the orchestrator created here, not one passed in)
+            orchestrator: Shared orchestrator, so the classifier and extractor can
+                reuse one set of clients and connection pools (default: a new one)
+        """
+        self._owns_orchestrator = orchestrator is None
+        self.orchestrator = orchestrator or LLMOrchestrator(use_cache=use_cache)
         self.prompts = self._load_prompts()
 
+    def close(self):
+        """Release the orchestrator's pooled connections (unless it was passed in)"""
+        if self._owns_orchestrator:
+            self.orchestrator.close()
+
     def _load_prompts(self) -> Dict[str, str]:
         """Load extraction prompts for each document type"""
-        prompts = {}
-        prompt_files = {
-            'invoice': 'prompts/invoice_extraction.txt',
-            'contract': 'prompts/contract_extraction.txt',
-            'email': 'prompts/email_extraction.txt',
-            'meeting_minutes': 'prompts/meeting_extraction.txt'
+        return {
+            doc_type: prompt if prompt is not None else self._get_default_prompt(doc_type)
+            for doc_type, prompt in load_extraction_prompt_files().items()
         }
 
-        for doc_type, file_path in prompt_files.items():
-            path = Path(file_path)
-            if path.exists():
-                with open(path, 'r') as f:
-                    prompts[doc_type] = f.read()
-            else:
-                prompts[doc_type] = self._get_default_prompt(doc_type)
-
-        return prompts
-
     def _get_default_prompt(self, doc_type: str) -> str:
         """Get default extraction prompt for document type"""
         if doc_type == 'invoice':
@@ -124,6 +127,19 @@ If a field is not found, use null or empty array."""
         """
         Extract structured fields using multi-model orchestration with validation.
 
+        Args:
+            text: The document text
+            doc_type: The document type (invoice, contract, email, meeting_minutes)
+
+        Returns:
+            Dictionary of extracted fields
+        """
+        return get_background_loop().run(self.aextract(text, doc_type))
+
+    async def aextract(self, text: str, doc_type: str) -> Dict[str, Any]:
+        """
+        Extract structured fields without blocking the event loop.
+
         Args:
             text: The document text
             doc_type: The document type (invoice, contract, email, meeting_minutes)
@@ -138,30 +154,81 @@ If a field is not found, use null or empty array."""
             return {}
 
         # Use orchestrator to extract with fallback and validation
-        extracted_data, provider = self.orchestrator.extract_with_fallback(
+        extracted_data, provider = await self.orchestrator.aextract_with_fallback(
             text,
             doc_type,
             prompt_template
         )
 
-        logger.info(f"Extracted {len(extracted_data)} fields via {provider}")
+        logger.info("Extracted %d fields via %s", len(extracted_data), provider)
         return extracted_data
 
-    def batch_extract(self, documents: list, doc_types: list) -> list:
+    def batch_extract(self, documents: list, doc_types: list, concurrency: int = BATCH_CONCURRENCY) -> list:
         """
         Extract fields from multiple documents.
 
         Args:
             documents: List of document dictionaries with 'text' field
             doc_types: List of document types corresponding to each document
+            concurrency: Maximum number of documents extracted at once
 
         Returns:
             List of extracted field dictionaries
         """
-        results = []
-        for i, (doc, doc_type) in enumerate(zip(documents, doc_types), 1):
-            logger.info(f"Extracting fields from document {i}/{len(documents)} ({doc_type})")
-            extracted = self.extract(doc.get('text', ''), doc_type)
-            results.append(extracted)
+        return get_background_loop().run(self.abatch_extract(documents, doc_types, concurrency))
+
+    async def abatch_extract(self, documents: list, doc_types: list, concurrency: int = BATCH_CONCURRENCY) -> list:
+        """
+        Extract fields from multiple documents concurrently.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            doc_types: List of document types corresponding to each document
+            concurrency: Maximum number of documents extracted at once
 
-        return results
+        Returns:
+            List of extracted field dictionaries, in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        # Progress every ~1% of the batch rather than every document
+        log_every = max(1, len(documents) // 100)
+
+        async def _run(i: int, doc: dict, doc_type: str) -> Dict[str, Any]:
+            async with semaphore:
+                if i % log_every == 0 or i == len(documents):
+                    logger.info("Extracting fields from document %d/%d (%s)", i, len(documents), doc_type)
+                return await self.aextract(doc.get('text', ''), doc_type)
+
+        return list(await asyncio.gather(*[
+            _run(i, doc, doc_type)
+            for i, (doc, doc_type) in enumerate(zip(documents, doc_types), 1)
+        ]))
+
+    async def aiter_extract(self, documents: list, doc_types: list,
+                            concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Extract fields from multiple documents, yielding each result as soon as it's ready.
+
+        Args:
+            documents: List of document dictionaries with 'text' field
+            doc_types: List of document types (same order as documents)
+            concurrency: Maximum number of documents extracted at once
+
+        Yields:
+            Tuples of (index into documents, extracted field dictionary), in completion order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(i: int, doc: dict, doc_type: str) -> Tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                return i, await self.aextract(doc.get('text', ''), doc_type)
+
+        tasks = [asyncio.create_task(_run(i, doc, doc_type))
+                 for i, (doc, doc_type) in enumerate(zip(documents, doc_types))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early: don't leave calls running in the background
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,26 @@
+"""
+Process-wide Gemini SDK configuration.
+
+genai.configure() throws away every client the SDK has built so far, so each
+component calling it on construction (classifier, extractor, orchestrators)
+made the next request re-open its gRPC channel. Configuring once per API key
+lets all of them share one pooled channel.
+"""
+
+import threading
+
+import google.generativeai as genai
+
+_configured_key = None
+_configure_lock = threading.Lock()
+
+
+def configure_gemini(api_key: str):
+    """Configure the Gemini SDK for api_key, unless it already is"""
+    global _configured_key
+    if _configured_key == api_key:
+        return
+    with _configure_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
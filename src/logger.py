@@ -14,16 +14,126 @@ from rich.progress import (
     TimeElapsedColumn
 )
 from rich.panel import Panel
+from rich.text import Text
 from rich.tree import Tree
 from rich.live import Live
 from rich.layout import Layout
 from rich import box
-from datetime import datetime
+from bisect import bisect_left
+from functools import wraps
 import time
 from typing import Dict, List, Any
 
 console = Console()
 
+# Confidence above each threshold moves up one color
+_CONFIDENCE_THRESHOLDS = (0.6, 0.8)
+_CONFIDENCE_COLORS = ("red", "yellow", "green")
+
+
+def _confidence_color(confidence: float) -> str:
+    """Color for a confidence score: >0.8 green, >0.6 yellow, otherwise red"""
+    return _CONFIDENCE_COLORS[bisect_left(_CONFIDENCE_THRESHOLDS, confidence)]
+
+
+# (second, "HH:MM:SS") of the last formatted timestamp
+_last_timestamp = (-1, "")
+
+
+def _timestamp() -> str:
+    """Current local time as HH:MM:SS, formatted at most once per second"""
+    global _last_timestamp
+    second = int(time.time())
+    if second != _last_timestamp[0]:
+        _last_timestamp = (second, time.strftime("%H:%M:%S", time.localtime(second)))
+    return _last_timestamp[1]
+
+
+# Styled pieces of the per-message log lines, built once instead of re-parsing
+# the same Rich markup on every call
+_SEPARATOR = Text.assemble(" ", ("│", "bold white"), " ")
+_SUCCESS_PREFIX = Text.assemble(_SEPARATOR, ("✓", "bold green"), " ")
+_INFO_ARROW = Text.assemble(("→", "blue"), " ")
+_WARNING_PREFIX = Text.assemble(_SEPARATOR, ("⚠", "bold yellow"), "  ")
+_ERROR_PREFIX = Text.assemble(_SEPARATOR, ("✗", "bold red"), " ")
+_DETAILS_INDENT = " " * 9
+
+
+def _buffered(method):
+    """Collect everything a method prints and write it to the terminal in one go"""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with console:
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _as_dict(doc: Any) -> Dict:
+    return doc.dict() if hasattr(doc, 'dict') else doc
+
+
+def _invoice_key_info(doc_dict: Dict) -> str:
+    client = doc_dict.get('client_name', 'N/A')
+    amount = doc_dict.get('total_amount', 0)
+    return f"{client} - ${amount:.2f}" if amount else client
+
+
+def _contract_key_info(doc_dict: Dict) -> str:
+    parties = doc_dict.get('parties', [])
+    return ', '.join(parties[:2]) if parties else 'N/A'
+
+
+def _email_key_info(doc_dict: Dict) -> str:
+    return doc_dict.get('sender', 'N/A')
+
+
+# Summary-table "Key Info" column per document type
+_KEY_INFO = {
+    'invoice': _invoice_key_info,
+    'contract': _contract_key_info,
+    'email': _email_key_info,
+}
+
+
+def _add_parties(tree: Tree, parties: List[str]):
+    if parties:
+        parties_node = tree.add("[yellow]Parties:[/yellow]")
+        for party in parties:
+            parties_node.add(f"[dim]• {party}[/dim]")
+
+
+def _render_invoice_tree(doc_dict: Dict, tree: Tree):
+    tree.add(f"[yellow]Invoice #:[/yellow] {doc_dict.get('invoice_number', 'N/A')}")
+    tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('invoice_date', 'N/A')}")
+    tree.add(f"[yellow]Client:[/yellow] {doc_dict.get('client_name', 'N/A')}")
+    tree.add(f"[yellow]Vendor:[/yellow] {doc_dict.get('vendor_name', 'N/A')}")
+    amount = doc_dict.get('total_amount', 0) or 0
+    tree.add(f"[yellow]Amount:[/yellow] ${amount:.2f} {doc_dict.get('currency', '')}")
+    _add_parties(tree, doc_dict.get('involved_parties', []))
+
+
+def _render_contract_tree(doc_dict: Dict, tree: Tree):
+    tree.add(f"[yellow]Contract ID:[/yellow] {doc_dict.get('contract_id', 'N/A')}")
+    tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('contract_date', 'N/A')}")
+    _add_parties(tree, doc_dict.get('parties', []))
+    tree.add(f"[yellow]Value:[/yellow] ${doc_dict.get('contract_value', 0):.2f}")
+
+
+def _render_email_tree(doc_dict: Dict, tree: Tree):
+    tree.add(f"[yellow]From:[/yellow] {doc_dict.get('sender', 'N/A')}")
+    recipients = doc_dict.get('recipients', [])
+    tree.add(f"[yellow]To:[/yellow] {', '.join(recipients) if recipients else 'N/A'}")
+    tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('email_date', 'N/A')}")
+    tree.add(f"[yellow]Subject:[/yellow] {doc_dict.get('subject', 'N/A')}")
+
+
+# Extracted-data tree branches per document type
+_TREE_RENDERERS = {
+    'invoice': _render_invoice_tree,
+    'contract': _render_contract_tree,
+    'email': _render_email_tree,
+}
+
 
 class PipelineLogger:
     """Enhanced logger for the document intelligence pipeline"""
@@ -33,6 +143,16 @@ class PipelineLogger:
         self.step_times = {}
         self.current_step = None
 
+    def buffered(self):
+        """
+        Context manager that holds console output until the block exits.
+
+        Use around loops that log many lines (e.g. one per file) so the terminal
+        gets a single write instead of one per message.
+        """
+        return console
+
+    @_buffered
     def print_header(self):
         """Print beautiful header"""
         console.print()
@@ -55,51 +175,31 @@ class PipelineLogger:
         self.current_step = title
         self.step_start_time = time.time()
 
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        console.print(
-            f"[bold blue]{timestamp}[/bold blue] "
-            f"[bold white]│[/bold white] "
-            f"{emoji} [bold cyan]Step {step_num}:[/bold cyan] [bold]{title}[/bold]"
-        )
+        console.print(Text.assemble(
+            (_timestamp(), "bold blue"), _SEPARATOR,
+            f"{emoji} ", (f"Step {step_num}:", "bold cyan"), " ", (title, "bold")
+        ))
 
+    @_buffered
     def success(self, message: str, details: str = None):
         """Print success message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        console.print(
-            f"[dim]{timestamp}[/dim] "
-            f"[bold white]│[/bold white] "
-            f"[bold green]✓[/bold green] {message}"
-        )
+        console.print(Text.assemble((_timestamp(), "dim"), _SUCCESS_PREFIX, message))
         if details:
-            console.print(f"         [dim]{details}[/dim]")
+            console.print(Text.assemble(_DETAILS_INDENT, (details, "dim")))
 
     def info(self, message: str, indent: int = 1):
         """Print info message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        indent_str = "  " * indent
-        console.print(
-            f"[dim]{timestamp}[/dim] "
-            f"[bold white]│[/bold white] "
-            f"{indent_str}[blue]→[/blue] {message}"
-        )
+        console.print(Text.assemble(
+            (_timestamp(), "dim"), _SEPARATOR, "  " * indent, _INFO_ARROW, message
+        ))
 
     def warning(self, message: str):
         """Print warning message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        console.print(
-            f"[dim]{timestamp}[/dim] "
-            f"[bold white]│[/bold white] "
-            f"[bold yellow]⚠[/bold yellow]  {message}"
-        )
+        console.print(Text.assemble((_timestamp(), "dim"), _WARNING_PREFIX, message))
 
     def error(self, message: str):
         """Print error message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        console.print(
-            f"[dim]{timestamp}[/dim] "
-            f"[bold white]│[/bold white] "
-            f"[bold red]✗[/bold red] {message}"
-        )
+        console.print(Text.assemble((_timestamp(), "dim"), _ERROR_PREFIX, message))
 
     def progress_bar(self, description: str, total: int):
         """Create a progress bar"""
@@ -114,7 +214,7 @@ class PipelineLogger:
 
     def classification_result(self, filename: str, doc_type: str, confidence: float, duration: float):
         """Display classification result"""
-        confidence_color = "green" if confidence > 0.8 else "yellow" if confidence > 0.6 else "red"
+        confidence_color = _confidence_color(confidence)
         console.print(
             f"         [dim]→[/dim] [cyan]{filename}[/cyan] "
             f"[bold white]→[/bold white] "
@@ -132,6 +232,7 @@ class PipelineLogger:
             f"[dim]in {duration:.1f}s[/dim]"
         )
 
+    @_buffered
     def print_summary_table(self, documents: List[Any]):
         """Print beautiful summary table"""
         table = Table(
@@ -146,28 +247,16 @@ class PipelineLogger:
         table.add_column("Confidence", justify="right")
         table.add_column("Key Info", style="dim")
 
-        for doc in documents:
-            doc_dict = doc.dict() if hasattr(doc, 'dict') else doc
-
+        for doc_dict in map(_as_dict, documents):
             # Get confidence with color
             confidence = doc_dict.get('confidence_score', 0)
-            confidence_color = "green" if confidence > 0.8 else "yellow" if confidence > 0.6 else "red"
+            confidence_color = _confidence_color(confidence)
             confidence_str = f"[{confidence_color}]{confidence:.1%}[/{confidence_color}]"
 
             # Get type-specific key info
             doc_type = doc_dict.get('document_type', 'unknown')
-            key_info = ""
-
-            if doc_type == 'invoice':
-                client = doc_dict.get('client_name', 'N/A')
-                amount = doc_dict.get('total_amount', 0)
-                key_info = f"{client} - ${amount:.2f}" if amount else client
-            elif doc_type == 'contract':
-                parties = doc_dict.get('parties', [])
-                key_info = ', '.join(parties[:2]) if parties else 'N/A'
-            elif doc_type == 'email':
-                sender = doc_dict.get('sender', 'N/A')
-                key_info = sender
+            key_info_fn = _KEY_INFO.get(doc_type)
+            key_info = key_info_fn(doc_dict) if key_info_fn else ""
 
             table.add_row(
                 doc_dict.get('file_name', 'unknown'),
@@ -180,15 +269,14 @@ class PipelineLogger:
         console.print(table)
         console.print()
 
+    @_buffered
     def print_extracted_data(self, documents: List[Any]):
         """Print extracted data in beautiful format"""
         console.print()
         console.print("[bold cyan]📄 Extracted Data Details[/bold cyan]")
         console.print()
 
-        for i, doc in enumerate(documents, 1):
-            doc_dict = doc.dict() if hasattr(doc, 'dict') else doc
-
+        for doc_dict in map(_as_dict, documents):
             # Create a tree for each document
             tree = Tree(
                 f"[bold cyan]{doc_dict.get('file_name', 'Unknown')}[/bold cyan] "
@@ -196,44 +284,17 @@ class PipelineLogger:
             )
 
             # Add fields based on document type
-            doc_type = doc_dict.get('document_type')
-
-            if doc_type == 'invoice':
-                tree.add(f"[yellow]Invoice #:[/yellow] {doc_dict.get('invoice_number', 'N/A')}")
-                tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('invoice_date', 'N/A')}")
-                tree.add(f"[yellow]Client:[/yellow] {doc_dict.get('client_name', 'N/A')}")
-                tree.add(f"[yellow]Vendor:[/yellow] {doc_dict.get('vendor_name', 'N/A')}")
-                amount = doc_dict.get('total_amount', 0) or 0
-                tree.add(f"[yellow]Amount:[/yellow] ${amount:.2f} {doc_dict.get('currency', '')}")
-                parties = doc_dict.get('involved_parties', [])
-                if parties:
-                    parties_node = tree.add("[yellow]Parties:[/yellow]")
-                    for party in parties:
-                        parties_node.add(f"[dim]• {party}[/dim]")
-
-            elif doc_type == 'contract':
-                tree.add(f"[yellow]Contract ID:[/yellow] {doc_dict.get('contract_id', 'N/A')}")
-                tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('contract_date', 'N/A')}")
-                parties = doc_dict.get('parties', [])
-                if parties:
-                    parties_node = tree.add("[yellow]Parties:[/yellow]")
-                    for party in parties:
-                        parties_node.add(f"[dim]• {party}[/dim]")
-                tree.add(f"[yellow]Value:[/yellow] ${doc_dict.get('contract_value', 0):.2f}")
-
-            elif doc_type == 'email':
-                tree.add(f"[yellow]From:[/yellow] {doc_dict.get('sender', 'N/A')}")
-                recipients = doc_dict.get('recipients', [])
-                tree.add(f"[yellow]To:[/yellow] {', '.join(recipients) if recipients else 'N/A'}")
-                tree.add(f"[yellow]Date:[/yellow] {doc_dict.get('email_date', 'N/A')}")
-                tree.add(f"[yellow]Subject:[/yellow] {doc_dict.get('subject', 'N/A')}")
+            render = _TREE_RENDERERS.get(doc_dict.get('document_type'))
+            if render:
+                render(doc_dict, tree)
 
             console.print(tree)
             console.print()
 
+    @_buffered
     def print_analytics(self, documents: List[Any]):
         """Print analytics summary"""
-        doc_list = [doc.dict() if hasattr(doc, 'dict') else doc for doc in documents]
+        doc_list = [_as_dict(doc) for doc in documents]
 
         # Calculate statistics
         total_docs = len(doc_list)
@@ -276,6 +337,7 @@ class PipelineLogger:
         console.print(table)
         console.print()
 
+    @_buffered
     def print_footer(self):
         """Print beautiful footer with timing"""
         total_time = time.time() - self.start_time
@@ -2,33 +2,215 @@
 Multi-model orchestrator with validation and automatic fallback.
 """
 
+import asyncio
+import atexit
 import logging
-from typing import Dict, Any, Tuple, Optional, List
-from openai import OpenAI
-import google.generativeai as genai
-import requests
-import json
+import math
+import queue
+import random
+import re
+import sys
+import time
+import unicodedata
+from collections import deque
+from contextlib import nullcontext
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Dict, Any, Tuple, Optional, List
+import httpx
+import orjson
+
+# The provider SDKs are slow to import; they're loaded on first use of each provider
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# HTTP/2 lets concurrent OpenAI requests share one connection (needs httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 from .config import (
     OPENAI_API_KEY, OPENAI_MODEL,
     GEMINI_API_KEY, GEMINI_MODEL,
-    OLLAMA_URL, OLLAMA_MODEL,
+    OLLAMA_URL, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_CLASSIFY_OPTIONS,
     MODEL_PRIORITY
 )
+from .cache import ResponseCache, SemanticCache, SEMANTIC_CACHE_AVAILABLE
+from .event_loop import get_background_loop
+from .parsing import extract_json
+from .prompts import render_prompt, truncate_tokens
+
+
+def start_queue_logging(level: int = logging.INFO):
+    """
+    Route root logging through a queue so provider calls never block on log I/O.
+
+    Handlers already on the root logger (or a basicConfig-style StreamHandler)
+    move behind a QueueListener thread; calling this again is a no-op. Call it
+    from a script's main(), not at import, so importers keep their own logging.
+    """
+    root = logging.getLogger()
+    if any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+
+    handlers = root.handlers[:]
+    if not handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        handlers = [handler]
+        root.setLevel(level)
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Any one keyword is enough to confirm a classification of that type
+_CLASSIFICATION_KEYWORDS = {
+    "invoice": frozenset(("invoice", "bill", "payment", "total", "amount", "$")),
+}
+# One case-insensitive pass over the text, without lowercasing a copy of it
+_CLASSIFICATION_KEYWORD_RES = {
+    doc_type: re.compile("|".join(re.escape(k) for k in sorted(keywords)), re.IGNORECASE)
+    for doc_type, keywords in _CLASSIFICATION_KEYWORDS.items()
+}
+# Above this confidence the keyword cross-check is skipped
+_KEYWORD_CHECK_MAX_CONFIDENCE = 0.95
+
+# Document text budgets, in tokens (about the 3000/1000 characters used before)
+_CLASSIFY_MAX_TOKENS = 750
+_VALIDATION_MAX_TOKENS = 250
+
+_CLASSIFY_SYSTEM_PROMPT = "You are a document classifier. Respond only with valid JSON."
+_EXTRACT_SYSTEM_PROMPT = "You are a data extraction specialist. Extract structured data and respond only with valid JSON."
+
+_PROVIDERS = ("openai", "gemini", "ollama")
+
+# Documents in flight at once in extract_batch()
+_EXTRACT_BATCH_CONCURRENCY = 32
+
+# Batch API jobs finished in any of these states
+_BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+# Local generation can take minutes on a cold model; only bound the connect
+_OLLAMA_TIMEOUT = httpx.Timeout(None, connect=10.0)
+
+
+# Appended to extraction prompts so the same reply carries the model's own
+# quality verdict, and the separate validator call is only needed when it's low
+_SELF_CHECK_INSTRUCTIONS = """
+
+Also include a "_self_check" key in the same JSON object:
+"_self_check": {"quality_score": 0.0-1.0, "missing_fields": ["field1", "field2"]}
+where quality_score rates how accurate and complete your extraction is."""
+
+
+def _parse_json_reply(text: str) -> Dict[str, Any]:
+    """First JSON object in a free-form model reply; raises so the caller falls back"""
+    result = extract_json(text)
+    if result is None:
+        raise ValueError("No JSON object in response")
+    return result
+
+
+def _response_cache_key(provider: str, model: str, temperature: float, prompt: str) -> str:
+    """Cache key over everything that affects a provider's reply (all calls request JSON)"""
+    prompt = unicodedata.normalize("NFC", prompt.strip())
+    return ResponseCache.make_key(provider, model, repr(temperature), "json_object", prompt)
+
+
+def _create_openai_client(http_client: httpx.AsyncClient) -> "AsyncOpenAI":
+    """OpenAI client over the given pool (retries are handled by _retry_transient)"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+
+def _create_gemini_client() -> Dict[str, Any]:
+    """Gemini model plus its request settings, built once rather than per call"""
+    import google.generativeai as genai
+    from google.generativeai.types import HarmCategory, HarmBlockThreshold
+    from .gemini import configure_gemini
+
+    configure_gemini(GEMINI_API_KEY)
+    return {
+        "client": genai.GenerativeModel(GEMINI_MODEL),
+        "model": GEMINI_MODEL,
+        # Business documents trip the default safety filters, so they're all off
+        "safety_settings": {
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        },
+        "classify_config": genai.GenerationConfig(
+            temperature=0.1,
+            max_output_tokens=512,
+            response_mime_type="application/json",
+            # JSON-mode schema for classification replies
+            response_schema={
+                "type": "object",
+                "properties": {"type": {"type": "string"}, "confidence": {"type": "number"}},
+                "required": ["type", "confidence"]
+            },
+        ),
+        "extract_config": genai.GenerationConfig(
+            temperature=0.2,
+            max_output_tokens=2048,
+            response_mime_type="application/json",
+        ),
+    }
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client shared by every provider's HTTP calls"""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        # Ask for compressed bodies; matters when Ollama runs on another host
+        headers={'Accept-Encoding': 'gzip, deflate'}
+    )
+
+
 class ValidationAgent:
     """Agent that validates extraction quality"""
 
-    def __init__(self, provider: str = "openai"):
+    def __init__(self, provider: str = "openai", client: Optional["AsyncOpenAI"] = None,
+                 cache: Optional[ResponseCache] = None, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            provider: LLM provider used for extraction validation
+            client: Existing OpenAI client to reuse (default: one created on first
+                validation)
+            cache: Response cache for validation verdicts (default: no caching)
+            http_client: Connection pool for the client created here, so the
+                validator can share the orchestrator's (default: a new pool,
+                closed by aclose())
+        """
         self.provider = provider
+        self.cache = cache
+        self._client = client
+        self._http_client = http_client
+        self._owns_http_client = client is None and http_client is None
         if provider == "openai":
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
             self.model = OPENAI_MODEL
 
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            if self._http_client is None:
+                self._http_client = _create_http_client()
+            self._client = _create_openai_client(self._http_client)
+        return self._client
+
     def validate_classification(self, text: str, classification: str, confidence: float) -> Tuple[bool, str]:
         """
         Validate if classification makes sense.
@@ -43,16 +225,35 @@ class ValidationAgent:
             return False, "Classification is unknown"
 
         # Quick validation: check if document has expected keywords
-        text_lower = text.lower()
-        if classification == "invoice":
-            keywords = ["invoice", "bill", "payment", "total", "amount", "$"]
-            if any(k in text_lower for k in keywords):
-                return True, "Valid invoice classification"
+        keywords_re = _CLASSIFICATION_KEYWORD_RES.get(classification)
+        if keywords_re is not None and confidence <= _KEYWORD_CHECK_MAX_CONFIDENCE:
+            if keywords_re.search(text):
+                return True, f"Valid {classification} classification"
             else:
-                return False, "Missing invoice keywords"
+                return False, f"Missing {classification} keywords"
 
         return True, "Valid classification"
 
+    def accept_self_check(self, extracted_data: Dict[str, Any], self_check: Any,
+                          min_quality: float = 0.6) -> Tuple[bool, str]:
+        """
+        Decide whether an extraction's own self-check is good enough to skip LLM validation.
+
+        Returns:
+            (is_accepted, reason)
+        """
+        if not extracted_data or len(extracted_data) < 3:
+            return False, "Too few fields extracted"
+
+        try:
+            quality_score = float(self_check.get("quality_score"))
+        except (AttributeError, TypeError, ValueError):
+            return False, "No self-check score"
+
+        if quality_score < min_quality:
+            return False, f"Low self-check quality: {quality_score:.2f}"
+        return True, f"Self-check quality: {quality_score:.2f}"
+
     def validate_extraction(self, text: str, extracted_data: Dict[str, Any], doc_type: str) -> Tuple[bool, str, Optional[Dict]]:
         """
         Validate extraction quality using LLM.
@@ -60,6 +261,20 @@ class ValidationAgent:
         Returns:
             (is_valid, reason, suggested_improvements)
         """
+        return get_background_loop().run(self.avalidate_extraction(text, extracted_data, doc_type))
+
+    async def avalidate_extraction(self, text: str, extracted_data: Dict[str, Any],
+                                   doc_type: str) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        Validate extraction quality using LLM, without blocking the event loop.
+
+        Returns:
+            (is_valid, reason, suggested_improvements)
+        """
+        return await get_background_loop().submit(self._validate_extraction(text, extracted_data, doc_type))
+
+    async def _validate_extraction(self, text: str, extracted_data: Dict[str, Any],
+                                   doc_type: str) -> Tuple[bool, str, Optional[Dict]]:
         if not extracted_data or len(extracted_data) < 3:
             return False, "Too few fields extracted", None
 
@@ -68,10 +283,10 @@ class ValidationAgent:
 
 Document type: {doc_type}
 Original text:
-{text[:1000]}
+{truncate_tokens(text, _VALIDATION_MAX_TOKENS, OPENAI_MODEL)}
 
 Extracted data:
-{json.dumps(extracted_data, indent=2)}
+{orjson.dumps(extracted_data, default=str).decode()}
 
 Evaluate:
 1. Are the extracted values accurate based on the text?
@@ -89,19 +304,25 @@ Respond with JSON:
 
         try:
             if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.1,
-                    response_format={"type": "json_object"}
-                )
+                cache_key = _response_cache_key(self.provider, self.model, 0.1, prompt)
+                result = self.cache.get(cache_key) if self.cache is not None else None
+                if result is None:
+                    response = await _retry_transient(lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0.1,
+                        response_format={"type": "json_object"}
+                    ))
+
+                    result = orjson.loads(response.choices[0].message.content)
+                    if self.cache is not None:
+                        self.cache.set(cache_key, result)
 
-                result = json.loads(response.choices[0].message.content)
                 is_valid = result.get("is_valid", False)
                 quality_score = result.get("quality_score", 0.0)
                 reason = result.get("reason", "Unknown")
 
-                logger.info(f"Validation result: {is_valid}, quality: {quality_score:.2f}")
+                logger.info("Validation result: %s, quality: %.2f", is_valid, quality_score)
 
                 # More lenient threshold - if quality > 0.6 and at least somewhat valid, accept it
                 return is_valid or quality_score > 0.6, reason, result
@@ -111,54 +332,329 @@ Respond with JSON:
             # If validation fails, assume extraction is OK to continue pipeline
             return True, "Validation error, assuming OK", None
 
+    async def aclose(self):
+        """Close the validator's HTTP connection pool (unless it was passed in)"""
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a rate-limit error's Retry-After header, if it carries one"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _transient_errors() -> Tuple[type, ...]:
+    """
+    Failures worth retrying on the same provider; anything else (auth, bad
+    request, unparseable reply) falls straight through to the next provider.
+
+    Only SDKs that are already imported are consulted: an error can't come
+    from one that hasn't been loaded.
+    """
+    errors = [httpx.TimeoutException, httpx.NetworkError]
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        # APIConnectionError includes timeouts
+        errors += [openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError]
+    google_exceptions = sys.modules.get("google.api_core.exceptions")
+    if google_exceptions is not None:
+        errors += [google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable,
+                   google_exceptions.DeadlineExceeded, google_exceptions.InternalServerError]
+    return tuple(errors)
+
+
+def _is_transient(error: BaseException) -> bool:
+    """
+    Whether a provider error is worth retrying on the same provider: one of
+    _transient_errors(), or an HTTP 429/5xx raised by raise_for_status()
+    (Ollama's "server busy" replies)
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, _transient_errors())
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """Whether a provider error is an HTTP 429"""
+    status = (getattr(error, "status_code", None) or getattr(error, "code", None)
+              or getattr(getattr(error, "response", None), "status_code", None))
+    return status == 429
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from an x-ratelimit-reset-* header ("20ms", "1s", "6m0s")"""
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+async def _retry_transient(call, attempts: int = 3, initial_delay: float = 0.5, max_delay: float = 8.0,
+                           limiter: Optional["AdaptiveLimiter"] = None):
+    """
+    Await call(), retrying transient provider errors with jittered exponential backoff.
+
+    A Retry-After header is honored; when it asks for longer than max_delay
+    the error is raised so the caller can move on to another provider. Each
+    attempt holds a slot in limiter (if given), but backoff sleeps don't.
+    """
+    for attempt in range(attempts):
+        try:
+            async with limiter or nullcontext():
+                return await call()
+        except Exception as e:
+            if attempt == attempts - 1 or not _is_transient(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, initial_delay * 2 ** attempt) + random.uniform(0, initial_delay)
+            elif delay > max_delay:
+                raise
+            logger.warning(f"Transient error ({type(e).__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Skips a failing provider instead of paying its timeout on every document.
+
+    Opens after failure_threshold consecutive errors (or at once on a rate
+    limit with Retry-After) and stays open for the cooldown. Once that has
+    passed, a single probe request is let through per cooldown: success closes
+    the breaker, another failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to the provider now"""
+        if self.open_until is None:
+            return True
+        now = time.monotonic()
+        if now < self.open_until:
+            return False
+        # Half-open: this caller is the probe; everyone else waits another cooldown
+        self.open_until = now + self.cooldown
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = None
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        self.failures += 1
+        if retry_after is not None:
+            self.open_until = time.monotonic() + retry_after
+        elif self.failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+
+class AdaptiveLimiter:
+    """
+    Caps one provider's concurrent calls, staying just under its rate limit.
+
+    OpenAI reports the remaining request budget on every response
+    (x-ratelimit-*), so the cap follows those headers once seen. Providers
+    without them fall back to AIMD: +1 per success, halved on a 429.
+    """
+
+    def __init__(self, initial: int = 8, maximum: int = 256):
+        self.limit = initial
+        self.maximum = maximum
+        self.active = 0
+        self._header_driven = False
+        self._waiters: deque = deque()
+
+    def update(self, headers) -> None:
+        """Resize from a response's x-ratelimit-remaining/reset-requests headers"""
+        reset = _parse_reset(headers.get("x-ratelimit-reset-requests"))
+        try:
+            remaining = int(headers.get("x-ratelimit-remaining-requests"))
+        except (TypeError, ValueError):
+            return
+        if reset is None:
+            return
+
+        self._header_driven = True
+        self.limit = min(self.maximum, max(1, remaining // max(1, math.ceil(reset))))
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.active
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def __aenter__(self):
+        while self.active >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Woken but cancelled before taking the slot: pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        if exc is not None and _is_rate_limited(exc):
+            self.limit = max(1, self.limit // 2)
+        elif exc is None and not self._header_driven:
+            self.limit = min(self.maximum, self.limit + 1)
+        self._wake()
+        return False
+
 
 class LLMOrchestrator:
-    """Orchestrates multiple LLM providers with automatic fallback"""
-
-    def __init__(self, providers: List[str] = None):
+    """
+    Orchestrates multiple LLM providers with automatic fallback.
+
+    Provider calls are async (AsyncOpenAI, Gemini's generate_content_async and
+    an httpx.AsyncClient for Ollama) and always run on the shared background
+    loop, so many documents can be in flight at once. The a*-prefixed
+    coroutines can be awaited from any event loop; the plain methods block.
+    Each provider's client is created the first time that provider is tried.
+    """
+
+    def __init__(self, providers: List[str] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 warmup: bool = True, use_cache: bool = True, semantic_cache: bool = False,
+                 hedge_after_ms: Optional[float] = None):
+        """
+        Args:
+            providers: Provider names in fallback order (default: MODEL_PRIORITY)
+            http_client: Async HTTP client shared by the OpenAI and Ollama calls
+                (default: a new pooled client, closed by close())
+            warmup: Load the Ollama model in the background so the first call
+                doesn't pay the cold-load cost
+            use_cache: Reuse cached provider replies for identical prompts, across runs
+            semantic_cache: Also reuse classifications of near-duplicate documents
+                (e.g. the same invoice scanned twice)
+            hedge_after_ms: Start the next provider's classification if the current
+                one hasn't answered within this many milliseconds, keeping whichever
+                valid answer arrives first (default: strict one-at-a-time fallback)
+        """
         self.providers = providers or MODEL_PRIORITY
-        self.clients = self._initialize_clients()
-        self.validator = ValidationAgent(provider="openai")
+        self.hedge_after_ms = hedge_after_ms
+        self._loop = get_background_loop()
+        self.cache = ResponseCache('llm_orchestrator') if use_cache else None
+
+        # Embedding-similarity cache consulted before any provider is called
+        self.semantic_cache = None
+        if semantic_cache and SEMANTIC_CACHE_AVAILABLE:
+            self.semantic_cache = SemanticCache('semantic_orchestrator')
+        elif semantic_cache:
+            logger.warning("Semantic cache not available. Install: pip install sentence-transformers faiss-cpu")
+
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or _create_http_client()
+
+        # Provider clients are created (and their SDKs imported) on first use
+        self.clients: Dict[str, Dict[str, Any]] = {}
+        self._client_tasks: Dict[str, asyncio.Task] = {}
+        self._breakers = {provider: CircuitBreaker() for provider in _PROVIDERS}
+        self._limiters = {provider: AdaptiveLimiter() for provider in _PROVIDERS}
+        # Calls in progress by input key, so concurrent duplicates share one
+        # (only touched from the background loop, so no lock needed)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.validator = ValidationAgent(provider="openai", cache=self.cache, http_client=self.http_client)
         logger.info(f"Initialized orchestrator with providers: {self.providers}")
 
-    def _initialize_clients(self) -> Dict[str, Any]:
-        """Initialize all available LLM clients"""
-        clients = {}
+        if warmup and "ollama" in self.providers:
+            asyncio.run_coroutine_threadsafe(self._warm_up_ollama(), self._loop.loop)
 
-        # OpenAI
+    async def _warm_up_ollama(self):
+        """Ask Ollama to load the model (an empty prompt loads without generating)"""
+        ollama = await self._get_client("ollama")
+        if ollama is None:
+            return
         try:
-            clients["openai"] = {
-                "client": OpenAI(api_key=OPENAI_API_KEY),
-                "model": OPENAI_MODEL
-            }
-            logger.info("✓ OpenAI client initialized")
+            await self.http_client.post(
+                f"{ollama['url']}/api/generate",
+                content=orjson.dumps({"model": ollama["model"], "prompt": "",
+                                      "keep_alive": OLLAMA_KEEP_ALIVE}),
+                headers={"Content-Type": "application/json"},
+                timeout=120
+            )
+            logger.info("✓ Ollama model loaded")
         except Exception as e:
-            logger.warning(f"Could not initialize OpenAI: {e}")
+            logger.warning(f"Ollama warmup failed: {e}")
+
+    async def _get_client(self, provider: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a provider's client entry, creating it on first use.
+
+        Returns:
+            Dict with the provider's "model" and "client" (or "url" for Ollama),
+            or None if the provider can't be used
+        """
+        task = self._client_tasks.get(provider)
+        if task is None:
+            task = self._client_tasks[provider] = asyncio.ensure_future(self._create_client(provider))
+        return await asyncio.shield(task)
 
-        # Gemini
+    async def _create_client(self, provider: str) -> Optional[Dict[str, Any]]:
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            clients["gemini"] = {
-                "client": genai.GenerativeModel(GEMINI_MODEL),
-                "model": GEMINI_MODEL
-            }
-            logger.info("✓ Gemini client initialized")
+            if provider == "openai":
+                # SDK imports take a while; keep them off the event loop
+                client = await asyncio.to_thread(_create_openai_client, self.http_client)
+                self.clients["openai"] = {"client": client, "model": OPENAI_MODEL}
+                self.validator._client = self.validator._client or client
+            elif provider == "gemini":
+                self.clients["gemini"] = await asyncio.to_thread(_create_gemini_client)
+            elif provider == "ollama":
+                # Only probed when Ollama is actually needed; the local server is optional
+                try:
+                    response = await self.http_client.get(f"{OLLAMA_URL}/api/tags", timeout=2)
+                except httpx.HTTPError:
+                    response = None
+                if response is None or response.status_code != 200:
+                    logger.info("Ollama not available (optional)")
+                    return None
+                self.clients["ollama"] = {"url": OLLAMA_URL, "model": OLLAMA_MODEL}
+            else:
+                logger.warning(f"Unknown provider: {provider}")
+                return None
         except Exception as e:
-            logger.warning(f"Could not initialize Gemini: {e}")
+            logger.warning(f"Could not initialize {provider}: {e}")
+            return None
 
-        # Ollama (optional)
-        try:
-            response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
-            if response.status_code == 200:
-                clients["ollama"] = {
-                    "url": OLLAMA_URL,
-                    "model": OLLAMA_MODEL
-                }
-                logger.info("✓ Ollama client initialized")
-        except Exception:
-            logger.info("Ollama not available (optional)")
+        logger.info(f"✓ {provider} client initialized")
+        return self.clients[provider]
 
-        return clients
+    def close(self):
+        """Release pooled HTTP connections (unless the HTTP client was passed in)"""
+        self._loop.run(self._aclose())
+
+    async def _aclose(self):
+        # The OpenAI clients wrap the shared HTTP client, so closing it closes them
+        if self._owns_http_client:
+            await self.http_client.aclose()
+        await self.validator.aclose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def classify_with_fallback(self, text: str, prompt_template: str) -> Tuple[str, float, str]:
         """
@@ -167,97 +663,329 @@ class LLMOrchestrator:
         Returns:
             (doc_type, confidence, provider_used)
         """
-        for provider in self.providers:
-            if provider not in self.clients:
-                continue
+        return self._loop.run(self._classify_with_fallback(text, prompt_template))
 
-            try:
-                logger.info(f"Attempting classification with {provider}...")
-                doc_type, confidence = self._classify_single(text, prompt_template, provider)
+    async def aclassify_with_fallback(self, text: str, prompt_template: str) -> Tuple[str, float, str]:
+        """
+        Classify document using multiple models with fallback, without blocking the event loop.
+
+        Returns:
+            (doc_type, confidence, provider_used)
+        """
+        return await self._loop.submit(self._classify_with_fallback(text, prompt_template))
 
-                # Validate
-                is_valid, reason = self.validator.validate_classification(text, doc_type, confidence)
+    async def aclassify_batch(self, texts: List[str], prompt_template: str) -> List[Tuple[str, float, str]]:
+        """
+        Classify several documents concurrently.
 
-                if is_valid:
-                    logger.info(f"✓ {provider} classification successful: {doc_type} ({confidence:.2%})")
-                    return doc_type, confidence, provider
-                else:
-                    logger.warning(f"✗ {provider} classification failed validation: {reason}")
+        Args:
+            texts: Document texts
+            prompt_template: Classification prompt template
 
-            except Exception as e:
-                logger.error(f"✗ {provider} classification error: {e}")
-                continue
+        Returns:
+            One (doc_type, confidence, provider_used) per text, in input order;
+            ("unknown", 0.0, "none") for documents that raised
+        """
+        results = await asyncio.gather(
+            *[self.aclassify_with_fallback(text, prompt_template) for text in texts],
+            return_exceptions=True
+        )
+        return [("unknown", 0.0, "none") if isinstance(result, BaseException) else result
+                for result in results]
+
+    async def _coalesce(self, key: str, make_call) -> Any:
+        """Await make_call(), or join the identical call already in flight under key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One waiter being cancelled (e.g. a lost hedge race) mustn't cancel the others
+        return await asyncio.shield(task)
+
+    async def _classify_with_fallback(self, text: str, prompt_template: str) -> Tuple[str, float, str]:
+        return await self._coalesce(
+            ResponseCache.make_key("classify", prompt_template, text),
+            lambda: self._classify_chain(text, prompt_template)
+        )
+
+    async def _classify_chain(self, text: str, prompt_template: str) -> Tuple[str, float, str]:
+        cached, embedding = await self._semantic_lookup(text)
+        if cached is not None:
+            logger.info("✓ Semantic cache hit: %s (%.2f%%)", cached[0], cached[1] * 100)
+            return cached
+
+        if self.hedge_after_ms is None:
+            result = await self._cascade_classify(text, prompt_template)
+        else:
+            result = await self._race_classify(text, prompt_template)
+
+        if result is None:
+            # All providers failed
+            logger.error("All providers failed for classification")
+            return "unknown", 0.0, "none"
+
+        if embedding is not None:
+            await asyncio.to_thread(self.semantic_cache.add, embedding, list(result))
+        return result
+
+    async def _attempt_classify(self, text: str, prompt_template: str,
+                                provider: str) -> Optional[Tuple[str, float, str]]:
+        """Classify with one provider; None if it's unavailable, tripped, errors or fails validation"""
+        if await self._get_client(provider) is None:
+            return None
+
+        breaker = self._breakers[provider]
+        if not breaker.allow():
+            logger.info("Skipping %s: circuit open after repeated failures", provider)
+            return None
 
-        # All providers failed
-        logger.error("All providers failed for classification")
-        return "unknown", 0.0, "none"
+        try:
+            logger.info("Attempting classification with %s...", provider)
+            doc_type, confidence = await self._classify_single(text, prompt_template, provider)
+            breaker.record_success()
 
-    def _classify_single(self, text: str, prompt_template: str, provider: str) -> Tuple[str, float]:
-        """Classify using a single provider"""
-        prompt = prompt_template.format(text=text[:3000])
+            # Validate
+            is_valid, reason = self.validator.validate_classification(text, doc_type, confidence)
 
+            if is_valid:
+                logger.info("✓ %s classification successful: %s (%.2f%%)", provider, doc_type, confidence * 100)
+                return doc_type, confidence, provider
+            else:
+                logger.warning(f"✗ {provider} classification failed validation: {reason}")
+
+        except Exception as e:
+            breaker.record_failure(_retry_after(e))
+            logger.error(f"✗ {provider} classification error: {e}")
+
+        return None
+
+    async def _cascade_classify(self, text: str, prompt_template: str) -> Optional[Tuple[str, float, str]]:
+        """Try providers one after another until one succeeds"""
+        for provider in self.providers:
+            result = await self._attempt_classify(text, prompt_template, provider)
+            if result is not None:
+                return result
+        return None
+
+    async def _race_classify(self, text: str, prompt_template: str) -> Optional[Tuple[str, float, str]]:
+        """
+        Hedged fallback: start the next provider when the current ones fail or
+        haven't answered within hedge_after_ms, and take the first valid result.
+        """
+        providers = iter(self.providers)
+        hedge_after = self.hedge_after_ms / 1000
+        pending = set()
+        exhausted = False
+
+        def launch_next():
+            nonlocal exhausted
+            provider = next(providers, None)
+            if provider is None:
+                exhausted = True
+            else:
+                pending.add(asyncio.create_task(self._attempt_classify(text, prompt_template, provider)))
+
+        launch_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=None if exhausted else hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                pending.difference_update(done)
+                for task in done:
+                    if task.result() is not None:
+                        return task.result()
+                # Slow or failed so far: bring in the next provider
+                if not exhausted:
+                    launch_next()
+            return None
+        finally:
+            # First valid answer wins; don't pay for the slower calls
+            for task in pending:
+                task.cancel()
+
+    async def _semantic_lookup(self, text: str):
+        """
+        Look up a near-duplicate document in the semantic cache.
+
+        Returns:
+            Tuple of (cached (doc_type, confidence, provider) or None, embedding to store on a miss)
+        """
+        if self.semantic_cache is None:
+            return None, None
+        # Embedding is CPU-bound; keep it off the event loop
+        embedding = await asyncio.to_thread(self.semantic_cache.embed, text[:1000])
+        cached = self.semantic_cache.lookup(embedding)
+        return (tuple(cached) if cached is not None else None), embedding
+
+    async def _classify_single(self, text: str, prompt_template: str, provider: str) -> Tuple[str, float]:
+        """Classify using a single provider, answering from the cache when possible"""
+        if await self._get_client(provider) is None:
+            raise ValueError(f"{provider} is not available")
+
+        prompt = render_prompt(prompt_template, truncate_tokens(text, _CLASSIFY_MAX_TOKENS, OPENAI_MODEL))
+        limiter = self._limiters[provider]
+        if self.cache is None:
+            return await _retry_transient(lambda: self._classify_call(prompt, provider), limiter=limiter)
+
+        cache_key = _response_cache_key(provider, self.clients[provider]["model"], 0.1, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = await _retry_transient(lambda: self._classify_call(prompt, provider), limiter=limiter)
+        self.cache.set(cache_key, result)
+        return result
+
+    async def _classify_call(self, prompt: str, provider: str) -> Tuple[str, float]:
+        """Send a rendered classification prompt to one provider"""
         if provider == "openai":
             client = self.clients["openai"]["client"]
             model = self.clients["openai"]["model"]
 
-            response = client.chat.completions.create(
+            stream = await client.chat.completions.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": "You are a document classifier. Respond only with valid JSON."},
+                    {"role": "system", "content": _CLASSIFY_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=True
             )
+            self._limiters["openai"].update(stream.response.headers)
 
-            result = json.loads(response.choices[0].message.content)
+            # Stop reading as soon as the JSON object is complete instead of
+            # waiting for the end of the completion
+            result = None
+            content = []
+            try:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    content.append(delta)
+                    if "}" in delta:
+                        result = extract_json("".join(content))
+                        if result is not None:
+                            break
+            finally:
+                await stream.close()
+
+            if result is None:
+                result = _parse_json_reply("".join(content))
             return result.get("type", "unknown"), float(result.get("confidence", 0.5))
 
         elif provider == "gemini":
-            model = self.clients["gemini"]["client"]
+            gemini = self.clients["gemini"]
 
-            generation_config = genai.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=512,
-            )
-
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-
-            response = model.generate_content(
+            response = await gemini["client"].generate_content_async(
                 prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
+                generation_config=gemini["classify_config"],
+                safety_settings=gemini["safety_settings"]
             )
 
             if not response.candidates or not response.text:
                 raise ValueError("Response blocked by safety filters")
 
-            json_str = response.text[response.text.find('{'):response.text.rfind('}')+1]
-            result = json.loads(json_str)
+            # JSON mode: the reply is the bare object, no fences or preamble
+            result = orjson.loads(response.text)
             return result.get("type", "unknown"), float(result.get("confidence", 0.5))
 
         elif provider == "ollama":
             url = self.clients["ollama"]["url"]
             model = self.clients["ollama"]["model"]
 
-            response = requests.post(
+            response = await self.http_client.post(
                 f"{url}/api/generate",
-                json={"model": model, "prompt": prompt, "stream": False, "temperature": 0.1}
+                content=orjson.dumps({"model": model, "prompt": prompt, "stream": False,
+                                      "keep_alive": OLLAMA_KEEP_ALIVE, "options": OLLAMA_CLASSIFY_OPTIONS}),
+                headers={"Content-Type": "application/json"},
+                timeout=_OLLAMA_TIMEOUT
             )
+            # A busy server answers 429/503; raise so it's retried, not parsed
+            response.raise_for_status()
 
-            response_text = response.json().get('response', '')
-            json_str = response_text[response_text.find('{'):response_text.rfind('}')+1]
-            result = json.loads(json_str)
+            response_text = orjson.loads(response.content).get('response', '')
+            result = _parse_json_reply(response_text)
             return result.get("type", "unknown"), float(result.get("confidence", 0.5))
 
         raise ValueError(f"Unknown provider: {provider}")
 
+    def classify_packed(self, texts: List[str]) -> Optional[List[Optional[Tuple[str, float]]]]:
+        """
+        Classify several documents with a single Ollama call.
+
+        Packing amortizes per-request overhead (prompt setup, model scheduling)
+        across documents, which dominates on small local models.
+
+        Args:
+            texts: Document texts (each truncated to _CLASSIFY_MAX_TOKENS tokens)
+
+        Returns:
+            One (doc_type, confidence) per text, with None for entries that fail
+            validation; None overall if Ollama is unavailable or the reply can't
+            be matched up with the inputs
+        """
+        return self._loop.run(self._classify_packed(texts))
+
+    async def aclassify_packed(self, texts: List[str]) -> Optional[List[Optional[Tuple[str, float]]]]:
+        """Async version of classify_packed()"""
+        return await self._loop.submit(self._classify_packed(texts))
+
+    async def _classify_packed(self, texts: List[str]) -> Optional[List[Optional[Tuple[str, float]]]]:
+        if not texts or await self._get_client("ollama") is None:
+            return None
+
+        sections = "\n---\n".join(
+            f"DOC {i}:\n{truncate_tokens(text, _CLASSIFY_MAX_TOKENS, OPENAI_MODEL)}" for i, text in enumerate(texts, 1)
+        )
+        prompt = (
+            "Classify each of the following business documents as one of: "
+            "invoice, contract, email, meeting_minutes.\n\n"
+            f"{sections}\n\n"
+            "Respond ONLY with a JSON object of this form, with one entry per document in order:\n"
+            '{"results": [{"type": "invoice", "confidence": 0.95}, ...]}'
+        )
+
+        try:
+            response = await self.http_client.post(
+                f"{self.clients['ollama']['url']}/api/generate",
+                content=orjson.dumps({
+                    "model": self.clients["ollama"]["model"],
+                    "prompt": prompt,
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "format": "json",
+                    "options": {"temperature": 0.1, "num_ctx": 8192}
+                }),
+                headers={"Content-Type": "application/json"},
+                timeout=_OLLAMA_TIMEOUT
+            )
+            response.raise_for_status()
+            result = extract_json(orjson.loads(response.content).get('response', ''))
+            entries = result.get("results") if result else None
+        except Exception as e:
+            logger.error(f"✗ ollama packed classification error: {e}")
+            return None
+
+        if not isinstance(entries, list) or len(entries) != len(texts):
+            logger.warning(f"Packed classification returned {len(entries or [])} results for {len(texts)} documents")
+            return None
+
+        results = []
+        for text, entry in zip(texts, entries):
+            try:
+                doc_type = str(entry.get("type", "unknown")).lower()
+                confidence = float(entry.get("confidence", 0.5))
+            except (AttributeError, TypeError, ValueError):
+                results.append(None)
+                continue
+            is_valid, _ = self.validator.validate_classification(text, doc_type, confidence)
+            results.append((doc_type, confidence) if is_valid else None)
+
+        return results
+
     def extract_with_fallback(self, text: str, doc_type: str, prompt_template: str) -> Tuple[Dict[str, Any], str]:
         """
         Extract fields using multiple models with validation.
@@ -265,24 +993,106 @@ class LLMOrchestrator:
         Returns:
             (extracted_data, provider_used)
         """
+        return self._loop.run(self._extract_with_fallback(text, doc_type, prompt_template))
+
+    async def aextract_with_fallback(self, text: str, doc_type: str,
+                                     prompt_template: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Extract fields using multiple models with validation, without blocking the event loop.
+
+        Returns:
+            (extracted_data, provider_used)
+        """
+        return await self._loop.submit(self._extract_with_fallback(text, doc_type, prompt_template))
+
+    async def _extract_with_fallback(self, text: str, doc_type: str,
+                                     prompt_template: str) -> Tuple[Dict[str, Any], str]:
+        extracted_data, provider = await self._coalesce(
+            ResponseCache.make_key("extract", doc_type, prompt_template, text),
+            lambda: self._extract_chain(text, doc_type, prompt_template)
+        )
+        # Each caller gets its own dict, even when the call was shared
+        return dict(extracted_data), provider
+
+    def extract_batch(self, items: List[Tuple[str, str, str]],
+                      concurrency: int = _EXTRACT_BATCH_CONCURRENCY
+                      ) -> Tuple[List[Dict[str, Any]], List[str], List[Optional[str]]]:
+        """
+        Extract fields from many documents at once, grouped by document type.
+
+        Args:
+            items: (text, doc_type, prompt_template) per document
+            concurrency: Maximum number of documents extracted at once
+
+        Returns:
+            (results, providers, errors): parallel lists in input order. A failed
+            document has {} in results, "none" in providers and a message in errors
+        """
+        return self._loop.run(self._extract_batch(items, concurrency))
+
+    async def aextract_batch(self, items: List[Tuple[str, str, str]],
+                             concurrency: int = _EXTRACT_BATCH_CONCURRENCY
+                             ) -> Tuple[List[Dict[str, Any]], List[str], List[Optional[str]]]:
+        """Awaitable extract_batch()"""
+        return await self._loop.submit(self._extract_batch(items, concurrency))
+
+    async def _extract_batch(self, items: List[Tuple[str, str, str]],
+                             concurrency: int) -> Tuple[List[Dict[str, Any]], List[str], List[Optional[str]]]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(text: str, doc_type: str, prompt_template: str) -> Tuple[Dict[str, Any], str]:
+            async with semaphore:
+                return await self._extract_with_fallback(text, doc_type, prompt_template)
+
+        # Send same-type documents back to back so their shared prompt prefix
+        # stays warm in the provider's cache
+        order = sorted(range(len(items)), key=lambda i: (items[i][1], items[i][2]))
+        outcomes = await asyncio.gather(*[_run(*items[i]) for i in order], return_exceptions=True)
+
+        results: List[Dict[str, Any]] = [{} for _ in items]
+        providers = ["none"] * len(items)
+        errors: List[Optional[str]] = [None] * len(items)
+        for i, outcome in zip(order, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[i] = str(outcome) or type(outcome).__name__
+                continue
+            results[i], providers[i] = outcome
+            if providers[i] == "none":
+                errors[i] = "All providers failed for extraction"
+        return results, providers, errors
+
+    async def _extract_chain(self, text: str, doc_type: str,
+                             prompt_template: str) -> Tuple[Dict[str, Any], str]:
         for provider in self.providers:
-            if provider not in self.clients:
+            if await self._get_client(provider) is None:
                 continue
 
-            try:
-                logger.info(f"Attempting extraction with {provider}...")
-                extracted_data = self._extract_single(text, doc_type, prompt_template, provider)
+            breaker = self._breakers[provider]
+            if not breaker.allow():
+                logger.info("Skipping %s: circuit open after repeated failures", provider)
+                continue
 
-                # Validate
-                is_valid, reason, validation_result = self.validator.validate_extraction(text, extracted_data, doc_type)
+            try:
+                logger.info("Attempting extraction with %s...", provider)
+                extracted_data = await self._extract_single(text, doc_type, prompt_template, provider)
+                self_check = extracted_data.pop("_self_check", None)
+                breaker.record_success()
+
+                # Validate: trust a confident self-check, otherwise ask the validator
+                is_valid, reason = self.validator.accept_self_check(extracted_data, self_check)
+                if not is_valid:
+                    is_valid, reason, validation_result = await self.validator.avalidate_extraction(
+                        text, extracted_data, doc_type
+                    )
 
                 if is_valid:
-                    logger.info(f"✓ {provider} extraction successful: {len(extracted_data)} fields")
+                    logger.info("✓ %s extraction successful: %d fields", provider, len(extracted_data))
                     return extracted_data, provider
                 else:
                     logger.warning(f"✗ {provider} extraction failed validation: {reason}")
 
             except Exception as e:
+                breaker.record_failure(_retry_after(e))
                 logger.error(f"✗ {provider} extraction error: {e}")
                 continue
 
@@ -290,65 +1100,276 @@ class LLMOrchestrator:
         logger.error("All providers failed for extraction")
         return {}, "none"
 
-    def _extract_single(self, text: str, doc_type: str, prompt_template: str, provider: str) -> Dict[str, Any]:
-        """Extract using a single provider"""
-        prompt = prompt_template.format(text=text)
-
+    async def _extract_single(self, text: str, doc_type: str, prompt_template: str, provider: str) -> Dict[str, Any]:
+        """Extract using a single provider, answering from the cache when possible"""
+        if await self._get_client(provider) is None:
+            raise ValueError(f"{provider} is not available")
+
+        prompt = render_prompt(prompt_template, text) + _SELF_CHECK_INSTRUCTIONS
+        limiter = self._limiters[provider]
+        if self.cache is None:
+            return await _retry_transient(lambda: self._extract_call(prompt, provider, doc_type), limiter=limiter)
+
+        cache_key = _response_cache_key(provider, self.clients[provider]["model"], 0.2, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = await _retry_transient(lambda: self._extract_call(prompt, provider, doc_type), limiter=limiter)
+        self.cache.set(cache_key, result)
+        return result
+
+    async def _extract_call(self, prompt: str, provider: str, doc_type: Optional[str] = None) -> Dict[str, Any]:
+        """Send a rendered extraction prompt to one provider"""
         if provider == "openai":
             client = self.clients["openai"]["client"]
             model = self.clients["openai"]["model"]
 
-            response = client.chat.completions.create(
+            raw = await client.chat.completions.with_raw_response.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": "You are a data extraction specialist. Extract structured data and respond only with valid JSON."},
+                    {"role": "system", "content": _EXTRACT_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                # Route same-type prompts (same system prompt and template prefix)
+                # to the same prompt cache; sent as a raw field so older SDKs accept it
+                extra_body={"prompt_cache_key": f"extract-{doc_type}"} if doc_type else None
             )
+            self._limiters["openai"].update(raw.headers)
+            response = raw.parse()
 
-            return json.loads(response.choices[0].message.content)
+            return orjson.loads(response.choices[0].message.content)
 
         elif provider == "gemini":
-            model = self.clients["gemini"]["client"]
-
-            generation_config = genai.GenerationConfig(
-                temperature=0.2,
-                max_output_tokens=2048,
-            )
+            gemini = self.clients["gemini"]
 
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-
-            response = model.generate_content(
+            response = await gemini["client"].generate_content_async(
                 prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
+                generation_config=gemini["extract_config"],
+                safety_settings=gemini["safety_settings"]
             )
 
             if not response.candidates or not response.text:
                 raise ValueError("Response blocked by safety filters")
 
-            json_str = response.text[response.text.find('{'):response.text.rfind('}')+1]
-            return json.loads(json_str)
+            return orjson.loads(response.text)
 
         elif provider == "ollama":
             url = self.clients["ollama"]["url"]
             model = self.clients["ollama"]["model"]
 
-            response = requests.post(
+            response = await self.http_client.post(
                 f"{url}/api/generate",
-                json={"model": model, "prompt": prompt, "stream": False, "temperature": 0.2}
+                content=orjson.dumps({"model": model, "prompt": prompt, "stream": False,
+                                      "keep_alive": OLLAMA_KEEP_ALIVE, "options": {"temperature": 0.2}}),
+                headers={"Content-Type": "application/json"},
+                timeout=_OLLAMA_TIMEOUT
             )
+            # A busy server answers 429/503; raise so it's retried, not parsed
+            response.raise_for_status()
 
-            response_text = response.json().get('response', '')
-            json_str = response_text[response_text.find('{'):response_text.rfind('}')+1]
-            return json.loads(json_str)
+            response_text = orjson.loads(response.content).get('response', '')
+            return _parse_json_reply(response_text)
 
         raise ValueError(f"Unknown provider: {provider}")
+
+    def batch_classify(self, texts: List[str], prompt_template: str,
+                       min_batch_size: int = 50) -> List[Tuple[str, float, str]]:
+        """
+        Classify many documents through the OpenAI Batch API (half the cost of online calls).
+
+        Meant for offline runs: results arrive when the whole job completes,
+        which can take minutes to hours. Documents the batch doesn't classify
+        validly are retried online with the normal fallback chain.
+
+        Args:
+            texts: Document texts
+            prompt_template: Classification prompt template
+            min_batch_size: Below this many documents (or without OpenAI), use
+                concurrent online calls instead, where latency matters more than cost
+
+        Returns:
+            One (doc_type, confidence, provider_used) per text, in input order
+        """
+        return self._loop.run(self._batch_classify(texts, prompt_template, min_batch_size))
+
+    async def abatch_classify(self, texts: List[str], prompt_template: str,
+                              min_batch_size: int = 50) -> List[Tuple[str, float, str]]:
+        """Async version of batch_classify()"""
+        return await self._loop.submit(self._batch_classify(texts, prompt_template, min_batch_size))
+
+    async def _batch_classify(self, texts: List[str], prompt_template: str,
+                              min_batch_size: int) -> List[Tuple[str, float, str]]:
+        if (len(texts) < min_batch_size or await self._get_client("openai") is None
+                or not self._breakers["openai"].allow()):
+            return await self.aclassify_batch(texts, prompt_template)
+
+        prompts = [render_prompt(prompt_template, truncate_tokens(text, _CLASSIFY_MAX_TOKENS, OPENAI_MODEL))
+                   for text in texts]
+        replies = await self._cached_openai_batch(prompts, _CLASSIFY_SYSTEM_PROMPT, 0.1, self._parse_classification)
+
+        results: List[Optional[Tuple[str, float, str]]] = [None] * len(texts)
+        for i, (text, reply) in enumerate(zip(texts, replies)):
+            if reply is not None and self.validator.validate_classification(text, *reply)[0]:
+                results[i] = (*reply, "openai")
+
+        retry = [i for i, result in enumerate(results) if result is None]
+        if retry:
+            logger.info(f"Retrying {len(retry)}/{len(texts)} batch classifications online")
+            for i, result in zip(retry, await self.aclassify_batch([texts[i] for i in retry], prompt_template)):
+                results[i] = result
+        return results
+
+    def batch_extract(self, texts: List[str], doc_type: str, prompt_template: str,
+                      min_batch_size: int = 50) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Extract fields from many documents of one type through the OpenAI Batch API.
+
+        Same trade-offs as batch_classify(); documents whose batch extraction
+        fails validation are retried online with the normal fallback chain.
+
+        Returns:
+            One (extracted_data, provider_used) per text, in input order
+        """
+        return self._loop.run(self._batch_extract(texts, doc_type, prompt_template, min_batch_size))
+
+    async def abatch_extract(self, texts: List[str], doc_type: str, prompt_template: str,
+                             min_batch_size: int = 50) -> List[Tuple[Dict[str, Any], str]]:
+        """Async version of batch_extract()"""
+        return await self._loop.submit(self._batch_extract(texts, doc_type, prompt_template, min_batch_size))
+
+    async def _batch_extract(self, texts: List[str], doc_type: str, prompt_template: str,
+                             min_batch_size: int) -> List[Tuple[Dict[str, Any], str]]:
+        if (len(texts) < min_batch_size or await self._get_client("openai") is None
+                or not self._breakers["openai"].allow()):
+            return list(await asyncio.gather(*[
+                self._extract_with_fallback(text, doc_type, prompt_template) for text in texts
+            ]))
+
+        prompts = [render_prompt(prompt_template, text) + _SELF_CHECK_INSTRUCTIONS for text in texts]
+        replies = await self._cached_openai_batch(prompts, _EXTRACT_SYSTEM_PROMPT, 0.2, orjson.loads)
+
+        async def _check(text: str, extracted_data: Optional[Dict[str, Any]]) -> Optional[Tuple[Dict[str, Any], str]]:
+            if not isinstance(extracted_data, dict):
+                return None
+            self_check = extracted_data.pop("_self_check", None)
+            is_valid, _ = self.validator.accept_self_check(extracted_data, self_check)
+            if not is_valid:
+                is_valid, _, _ = await self.validator.avalidate_extraction(text, extracted_data, doc_type)
+            return (extracted_data, "openai") if is_valid else None
+
+        results = list(await asyncio.gather(*[_check(text, reply) for text, reply in zip(texts, replies)]))
+
+        retry = [i for i, result in enumerate(results) if result is None]
+        if retry:
+            logger.info(f"Retrying {len(retry)}/{len(texts)} batch extractions online")
+            retried = await asyncio.gather(*[
+                self._extract_with_fallback(texts[i], doc_type, prompt_template) for i in retry
+            ])
+            for i, result in zip(retry, retried):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _parse_classification(content: str) -> Tuple[str, float]:
+        result = orjson.loads(content)
+        return result.get("type", "unknown"), float(result.get("confidence", 0.5))
+
+    async def _cached_openai_batch(self, prompts: List[str], system_prompt: str,
+                                   temperature: float, parse) -> List[Optional[Any]]:
+        """
+        Parsed OpenAI replies for prompts, sending only cache misses as one batch job.
+
+        Returns:
+            One parsed reply per prompt, or None where the job or parsing failed
+        """
+        model = self.clients["openai"]["model"]
+        keys = [_response_cache_key("openai", model, temperature, prompt) for prompt in prompts]
+        replies = [self.cache.get(key) if self.cache is not None else None for key in keys]
+
+        todo = [i for i, reply in enumerate(replies) if reply is None]
+        if not todo:
+            return replies
+
+        contents = await self._run_openai_batch([prompts[i] for i in todo], system_prompt, temperature)
+        for i, content in zip(todo, contents):
+            if content is None:
+                continue
+            try:
+                replies[i] = parse(content)
+            except (orjson.JSONDecodeError, TypeError, ValueError):
+                continue
+            if self.cache is not None:
+                self.cache.set(keys[i], replies[i])
+        return replies
+
+    async def _run_openai_batch(self, prompts: List[str], system_prompt: str, temperature: float,
+                                max_poll_interval: float = 300.0) -> List[Optional[str]]:
+        """
+        Run chat completions for prompts as one Batch API job and wait for it.
+
+        Returns:
+            The reply content for each prompt, or None where that request failed
+        """
+        client = self.clients["openai"]["client"]
+        model = self.clients["openai"]["model"]
+        contents: List[Optional[str]] = [None] * len(prompts)
+
+        requests_jsonl = b"\n".join(
+            orjson.dumps({
+                "custom_id": f"doc-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": temperature,
+                    "response_format": {"type": "json_object"}
+                }
+            })
+            for i, prompt in enumerate(prompts)
+        )
+
+        try:
+            batch_file = await client.files.create(file=("requests.jsonl", requests_jsonl), purpose="batch")
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted OpenAI batch {batch.id} ({len(prompts)} requests)")
+
+            # Jobs take minutes to hours; back off so polling stays cheap
+            poll_interval = 5.0
+            while batch.status not in _BATCH_FINAL_STATES:
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, max_poll_interval)
+                batch = await _retry_transient(lambda: client.batches.retrieve(batch.id))
+
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.error(f"OpenAI batch {batch.id} ended with status {batch.status}")
+                return contents
+
+            output = await client.files.content(batch.output_file_id)
+        except Exception as e:
+            self._breakers["openai"].record_failure(_retry_after(e))
+            logger.error(f"OpenAI batch error: {e}")
+            return contents
+
+        self._breakers["openai"].record_success()
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            i = int(record["custom_id"].rsplit("-", 1)[1])
+            contents[i] = response["body"]["choices"][0]["message"]["content"]
+
+        logger.info(f"OpenAI batch {batch.id}: {sum(c is not None for c in contents)}/{len(prompts)} succeeded")
+        return contents
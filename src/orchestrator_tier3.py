@@ -2,25 +2,188 @@
 Tier 3 Advanced Orchestrator: Ensemble + DSPy Optimization
 """
 
+import asyncio
+import copy
+import hashlib
+import inspect
 import logging
-from typing import Dict, Any, Tuple, List, Optional
-from openai import OpenAI
+import threading
+import time
+from contextlib import aclosing
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Dict, Any, Iterator, Tuple, List, Optional
+from openai import AsyncOpenAI
 import google.generativeai as genai
-import requests
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import dspy
-from collections import Counter
+from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import httpx
+import orjson
+from collections import Counter, OrderedDict
+
+# Optional fuzzy matching for the DSPy extraction metric
+try:
+    from rapidfuzz import fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
 
 from .config import (
     OPENAI_API_KEY, OPENAI_MODEL,
     GEMINI_API_KEY, GEMINI_MODEL,
-    OLLAMA_URL, OLLAMA_MODEL
+    OLLAMA_URL, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_CLASSIFY_OPTIONS,
+    EXTRACTION_HISTORY_FILE, BATCH_CONCURRENCY
 )
+from .cache import ResponseCache
+from .event_loop import get_background_loop
+from .gemini import configure_gemini
+from .parsing import extract_json
+from .prompts import count_tokens, render_prompt, truncate_tokens
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Provider replies kept in memory per orchestrator (least recently used evicted first)
+_CACHE_MAX_ENTRIES = 1024
+
+# Default requests per minute for each provider
+_DEFAULT_RATE_LIMITS = {"openai": 500, "gemini": 60, "ollama": 1000}
+
+# Default calls in flight per provider (Ollama serves OLLAMA_NUM_PARALLEL at once)
+_DEFAULT_CONCURRENCY = {"openai": 50, "gemini": 50, "ollama": BATCH_CONCURRENCY}
+
+# Classification input budget per provider, in tokens (counted with the
+# OpenAI tokenizer, an approximation for the others)
+_CLASSIFY_MAX_TOKENS = {"openai": 8000, "gemini": 8000, "ollama": 3000}
+
+# Ollama context windows are rounded up to a multiple of this (never below the
+# minimum), so similar prompts share one loaded context instead of making the
+# server reload the model at every size
+_OLLAMA_CTX_STEP = 2048
+_OLLAMA_MIN_CTX = 4096
+
+# Headroom on prompt token counts, which use the OpenAI tokenizer
+_OLLAMA_CTX_MARGIN = 1.2
+
+# Most history entries fed to one DSPy optimization run
+_MAX_DSPY_EXAMPLES = 100
+
+# Largest parallel teacher rollout pool for one DSPy optimization run
+_DSPY_MAX_THREADS = 8
+
+# Training set size from which MIPROv2's instruction search beats plain bootstrapping
+_MIPRO_MIN_EXAMPLES = 20
+
+# partial_ratio above which a predicted field counts as matching the expected one
+_FUZZY_MATCH_THRESHOLD = 80
+
+# Share of string fields two extractions must agree on to count toward a quorum
+_QUORUM_AGREEMENT = 0.8
+
+# Prepended to a prompt whose {text} holds several delimited documents
+_PACKED_PREAMBLE = (
+    "The document text below contains {count} separate documents, each starting with a "
+    "\"---DOC <n>---\" line. Apply the instructions to each document on its own and return "
+    "ONE JSON object keyed by document number, e.g. {{\"0\": {{...}}, \"1\": {{...}}}}.\n\n"
+)
+
+
+def _supported_kwargs(fn, **kwargs) -> Dict[str, Any]:
+    """Drop keyword arguments that fn does not accept (DSPy's optimizer APIs vary by release)"""
+    params = inspect.signature(fn).parameters
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return kwargs
+    return {k: v for k, v in kwargs.items() if k in params}
+
+
+# Business documents trip Gemini's default safety filters, so they're all off
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
+
+@lru_cache(maxsize=None)
+def _gemini_config(max_output_tokens: int) -> "genai.GenerationConfig":
+    """Gemini generation config for a reply budget (packed prompts scale it per document)"""
+    return genai.GenerationConfig(temperature=0.1, max_output_tokens=max_output_tokens)
+
+
+# Single-document Gemini configs
+CLASSIFY_GEN_CFG = _gemini_config(512)
+EXTRACT_GEN_CFG = _gemini_config(2048)
+
+
+# One DSPy LM for the whole process, built on the first optimization run
+_dspy_lm = None
+_dspy_lock = threading.Lock()
+
+
+def _ensure_lm():
+    """Import DSPy and configure its global LM once (the import alone is slow)"""
+    global _dspy_lm
+    if _dspy_lm is None:
+        with _dspy_lock:
+            if _dspy_lm is None:
+                import dspy
+                lm = dspy.LM(model=f'openai/{OPENAI_MODEL}', api_key=OPENAI_API_KEY)
+                dspy.configure(lm=lm)
+                _dspy_lm = lm
+    return _dspy_lm
+
+
+def _dedup_key(item: Any) -> Any:
+    """Hashable identity for a merged list item (dicts and lists compare by canonical JSON)"""
+    if isinstance(item, (dict, list)):
+        return orjson.dumps(item, option=orjson.OPT_SORT_KEYS)
+    return item
+
+
+def _parse_json_reply(text: str) -> Dict[str, Any]:
+    """Parse the JSON object out of a free-form reply, raising ValueError if there is none"""
+    result = extract_json(text)
+    if result is None:
+        raise ValueError("No JSON object in response")
+    return result
+
+
+def _ollama_num_ctx(prompt: str, reply_tokens: int) -> int:
+    """
+    Context window an Ollama call needs for prompt plus its reply.
+
+    Ollama drops the start of a prompt that overflows num_ctx, which is where
+    the instructions are, so the window is sized from the prompt itself.
+    """
+    needed = int(count_tokens(prompt, OPENAI_MODEL) * _OLLAMA_CTX_MARGIN) + reply_tokens
+    return max(_OLLAMA_MIN_CTX, -(-needed // _OLLAMA_CTX_STEP) * _OLLAMA_CTX_STEP)
+
+
+def _fields_agree(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """
+    Whether two extractions agree on at least _QUORUM_AGREEMENT of the string
+    fields either one filled in (case and surrounding whitespace ignored).
+    """
+    keys = {k for k, v in a.items() if isinstance(v, str)} | {k for k, v in b.items() if isinstance(v, str)}
+    if not keys:
+        return False
+    matches = sum(
+        1 for k in keys
+        if isinstance(a.get(k), str) and isinstance(b.get(k), str)
+        and a[k].strip().lower() == b[k].strip().lower()
+    )
+    return matches / len(keys) >= _QUORUM_AGREEMENT
+
+
+def _pack_documents(texts: List[str]) -> str:
+    """Join texts into one numbered, delimited block for a packed prompt"""
+    return "\n".join(f"---DOC {i}---\n{text}" for i, text in enumerate(texts))
+
+
+def _packed_prompt(prompt_template: str, texts: List[str]) -> str:
+    return _PACKED_PREAMBLE.format(count=len(texts)) + render_prompt(prompt_template, _pack_documents(texts))
+
 
 class FieldMerger:
     """Merges extraction results from multiple models using voting and quality scoring"""
@@ -42,16 +205,17 @@ class FieldMerger:
         if len(results) == 1:
             return results[0]
 
-        # Get all unique keys
-        all_keys = set()
+        # One pass over the results: non-null values per field, in first-seen key order
+        values_by_key: Dict[str, List[Any]] = {}
         for result in results:
-            all_keys.update(result.keys())
+            for key, value in result.items():
+                key_values = values_by_key.setdefault(key, [])
+                if value is not None:
+                    key_values.append(value)
 
         merged = {}
 
-        for key in all_keys:
-            values = [r.get(key) for r in results if r.get(key) is not None]
-
+        for key, values in values_by_key.items():
             if not values:
                 merged[key] = None
                 continue
@@ -64,17 +228,20 @@ class FieldMerger:
                 merged[key] = sum(values) / len(values)
 
             elif isinstance(sample_value, list):
-                # Array: take union
-                all_items = []
+                # Array: take union, keeping first-seen order (items may be dicts)
+                union: Dict[Any, Any] = {}
                 for v in values:
                     if isinstance(v, list):
-                        all_items.extend(v)
-                merged[key] = list(set(all_items))
+                        for item in v:
+                            union.setdefault(_dedup_key(item), item)
+                merged[key] = list(union.values())
 
             elif isinstance(sample_value, str):
                 # String: use voting (most common)
-                counter = Counter(values)
-                merged[key] = counter.most_common(1)[0][0]
+                if len(values) == 1:
+                    merged[key] = sample_value
+                else:
+                    merged[key] = Counter(values).most_common(1)[0][0]
 
             else:
                 # Default: take first non-null
@@ -88,15 +255,12 @@ class DSPyOptimizer:
     """DSPy-based prompt optimizer"""
 
     def __init__(self):
-        # Configure DSPy with OpenAI
-        self.lm = dspy.LM(model=f'openai/{OPENAI_MODEL}', api_key=OPENAI_API_KEY)
-        dspy.configure(lm=self.lm)
-
-        # Define DSPy signature for extraction
+        # DSPy and its LM are only loaded once an optimization actually runs
         self.extraction_module = None
 
     def create_extraction_signature(self, doc_type: str):
         """Create DSPy signature for extraction"""
+        import dspy
 
         if doc_type == "invoice":
             class InvoiceExtraction(dspy.Signature):
@@ -126,6 +290,9 @@ class DSPyOptimizer:
             examples: List of (text, expected_output) tuples
             doc_type: Document type
         """
+        _ensure_lm()
+        import dspy
+
         signature = self.create_extraction_signature(doc_type)
         if not signature:
             return None
@@ -133,9 +300,6 @@ class DSPyOptimizer:
         # Create predictor
         predictor = dspy.ChainOfThought(signature)
 
-        # Compile with optimizer (BootstrapFewShot)
-        optimizer = dspy.BootstrapFewShot(metric=self._extraction_metric)
-
         # Convert examples to DSPy format
         dspy_examples = []
         for text, expected in examples:
@@ -145,14 +309,33 @@ class DSPyOptimizer:
             ).with_inputs('document_text')
             dspy_examples.append(example)
 
-        # Optimize
-        if dspy_examples:
-            optimized = optimizer.compile(predictor, trainset=dspy_examples[:3])
-            self.extraction_module = optimized
-            logger.info(f"DSPy optimization complete for {doc_type}")
-            return optimized
+        if not dspy_examples:
+            return predictor
+
+        # Teacher rollouts are LLM-bound, so run them in parallel
+        num_threads = min(_DSPY_MAX_THREADS, len(dspy_examples))
+
+        if len(dspy_examples) >= _MIPRO_MIN_EXAMPLES:
+            # Enough data for a Bayesian search over instructions and demos
+            optimizer = dspy.MIPROv2(metric=self._extraction_metric, auto="light", num_threads=num_threads)
+            compile_kwargs = _supported_kwargs(optimizer.compile, requires_permission_to_run=False)
+        else:
+            optimizer = dspy.BootstrapFewShot(**_supported_kwargs(
+                dspy.BootstrapFewShot.__init__,
+                metric=self._extraction_metric,
+                max_bootstrapped_demos=4,
+                num_threads=num_threads
+            ))
+            compile_kwargs = {}
 
-        return predictor
+        # Optimize
+        optimized = optimizer.compile(predictor, trainset=dspy_examples, **compile_kwargs)
+        self.extraction_module = optimized
+        logger.info(
+            f"DSPy optimization complete for {doc_type} "
+            f"({type(optimizer).__name__}, {len(dspy_examples)} examples)"
+        )
+        return optimized
 
     def _extraction_metric(self, example, prediction, trace=None):
         """Metric to evaluate extraction quality"""
@@ -167,30 +350,192 @@ class DSPyOptimizer:
             predicted = getattr(prediction, key, None)
 
             if expected and predicted:
-                if str(expected).lower() in str(predicted).lower() or str(predicted).lower() in str(expected).lower():
+                e = str(expected).lower()
+                p = str(predicted).lower()
+                if RAPIDFUZZ_AVAILABLE:
+                    if fuzz.partial_ratio(e, p) > _FUZZY_MATCH_THRESHOLD:
+                        score += 1
+                elif e in p or p in e:
                     score += 1
 
         return score / total if total > 0 else 0
 
 
+class RateLimiter:
+    """Token bucket allowing at most `rate` calls per `period` seconds (async context manager)"""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.capacity = rate
+        self._per_second = rate / period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        # Waiters queue on the lock, so they're served in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) / self._per_second)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
 class Tier3Orchestrator:
-    """Advanced orchestrator with ensemble extraction and DSPy optimization"""
+    """
+    Advanced orchestrator with ensemble extraction and DSPy optimization.
+
+    Provider calls are async (AsyncOpenAI, Gemini's generate_content_async and
+    an httpx.AsyncClient for Ollama) and run on the shared background loop, so
+    fanning out to every provider costs no threads. The a*-prefixed coroutines
+    can be awaited from any event loop; the plain methods block.
+    """
+
+    def __init__(self, max_concurrency: int = 32, min_quorum: int = 2,
+                 rate_limits: Optional[Dict[str, int]] = None, history_file: Optional[Path] = None,
+                 provider_concurrency: Optional[Dict[str, int]] = None, use_cache: bool = True):
+        """
+        Args:
+            max_concurrency: Maximum provider calls in flight at once, across providers
+            min_quorum: ensemble_extract stops waiting for slower providers once
+                this many extractions agree
+            rate_limits: Requests per minute by provider, overriding the defaults
+                (openai 500, gemini 60, ollama 1000)
+            history_file: JSON Lines file ensemble results are appended to for
+                DSPy optimization (default: EXTRACTION_HISTORY_FILE)
+            provider_concurrency: Calls in flight per provider, overriding the
+                defaults (openai 50, gemini 50, ollama OLLAMA_NUM_PARALLEL)
+            use_cache: Also keep provider replies on disk, so reruns over the
+                same documents skip the network
+        """
+        self.min_quorum = min_quorum
+        self._loop = get_background_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # A slow provider (usually Ollama) can't hog the slots the others need
+        self._provider_slots = {
+            provider: asyncio.Semaphore(limit)
+            for provider, limit in {**_DEFAULT_CONCURRENCY, **(provider_concurrency or {})}.items()
+        }
+        # Pace each provider below its rate limit instead of bursting into 429s
+        self.limits = {
+            provider: RateLimiter(rpm, 60.0)
+            for provider, rpm in {**_DEFAULT_RATE_LIMITS, **(rate_limits or {})}.items()
+        }
+        # Long-lived connection pool: no TCP/TLS handshakes per document
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
 
-    def __init__(self):
         self.clients = self._initialize_clients()
         self.merger = FieldMerger()
         self.dspy_optimizer = DSPyOptimizer()
-        self.extraction_history = []  # For DSPy learning
+        # Ensemble results for DSPy learning, appended to disk as they're produced
+        self.history_file = Path(history_file or EXTRACTION_HISTORY_FILE)
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        self._history_fp = open(self.history_file, 'ab')
+
+        # Provider replies by (task, provider, prompt hash), so replays of the
+        # same documents (e.g. DSPy runs over the history) skip the network.
+        # Only touched from the background loop, so no lock needed
+        self._cache: "OrderedDict[Tuple[str, str, bytes], Any]" = OrderedDict()
+        self.cache_hits = 0
+        # Persistent copy keyed by model as well, consulted on in-memory misses
+        self.cache = ResponseCache('llm_tier3') if use_cache else None
         logger.info("✓ Tier 3 Orchestrator initialized (Ensemble + DSPy)")
 
+    def close(self):
+        """Release pooled HTTP connections and the history file"""
+        self._loop.run(self._http.aclose())
+        self._history_fp.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _record_history(self, text: str, doc_type: str, merged: Dict[str, Any],
+                        results: List[Dict[str, Any]]):
+        self._history_fp.write(orjson.dumps({
+            'text': text,
+            'doc_type': doc_type,
+            'merged_result': merged,
+            'individual_results': results
+        }, default=str) + b"\n")
+        self._history_fp.flush()
+
+    def iter_history(self, doc_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream recorded ensemble results from the history file.
+
+        Args:
+            doc_type: Only yield entries of this document type (default: all)
+
+        Yields:
+            Dicts with text, doc_type, merged_result and individual_results
+        """
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = orjson.loads(line)
+                if doc_type is None or entry['doc_type'] == doc_type:
+                    yield entry
+
+    def clear_cache(self):
+        """Forget all cached provider replies, in memory and on disk"""
+        self._cache.clear()
+        self.cache_hits = 0
+        if self.cache is not None:
+            self.cache.clear()
+
+    async def _cached_call(self, task: str, provider: str, prompt: str, call) -> Any:
+        """Return the reply of await call() for this prompt, from cache if it was seen before"""
+        key = (task, provider, hashlib.blake2b(prompt.encode(), digest_size=16).digest())
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return copy.deepcopy(self._cache[key])
+
+        disk_key = None
+        result = None
+        if self.cache is not None:
+            disk_key = ResponseCache.make_key(task, provider, self.clients[provider]["model"], prompt)
+            result = self.cache.get(disk_key)
+
+        if result is None:
+            # Take a rate-limit token only once the provider has a free slot
+            async with self._provider_slots[provider], self.limits[provider], self._semaphore:
+                result = await call()
+            # Empty replies are not persisted, so a later run retries them
+            if disk_key is not None and result:
+                self.cache.set(disk_key, result)
+        else:
+            self.cache_hits += 1
+
+        self._cache[key] = result
+        if len(self._cache) > _CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        # Callers may mutate what they get back; keep the cached reply pristine
+        return copy.deepcopy(result)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def _initialize_clients(self) -> Dict[str, Any]:
         """Initialize all available LLM clients"""
         clients = {}
 
-        # OpenAI
+        # OpenAI (shares the pooled HTTP client)
         try:
             clients["openai"] = {
-                "client": OpenAI(api_key=OPENAI_API_KEY),
+                "client": AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=self._http),
                 "model": OPENAI_MODEL
             }
             logger.info("✓ OpenAI initialized")
@@ -199,7 +544,7 @@ class Tier3Orchestrator:
 
         # Gemini
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
+            configure_gemini(GEMINI_API_KEY)
             clients["gemini"] = {
                 "client": genai.GenerativeModel(GEMINI_MODEL),
                 "model": GEMINI_MODEL
@@ -210,7 +555,7 @@ class Tier3Orchestrator:
 
         # Ollama
         try:
-            response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
+            response = httpx.get(f"{OLLAMA_URL}/api/tags", timeout=2)
             if response.status_code == 200:
                 clients["ollama"] = {
                     "url": OLLAMA_URL,
@@ -222,6 +567,32 @@ class Tier3Orchestrator:
 
         return clients
 
+    async def _fanout(self, fn, *args) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run await fn(*args, provider) for every provider concurrently.
+
+        Use inside contextlib.aclosing() so leaving the loop early cancels
+        the calls still running.
+
+        Yields:
+            (provider, result or the exception it raised), in completion order
+        """
+        # Every call is started before any result is awaited; awaiting inside
+        # the loop that starts them would quietly run the providers one after another
+        tasks = {asyncio.ensure_future(fn(*args, provider)): provider for provider in self.clients}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        yield tasks[task], task.result()
+                    except Exception as e:
+                        yield tasks[task], e
+        finally:
+            for task in pending:
+                task.cancel()
+
     def ensemble_extract(self, text: str, doc_type: str, prompt_template: str) -> Tuple[Dict[str, Any], List[str]]:
         """
         Extract using ALL models in parallel, then merge results.
@@ -229,58 +600,159 @@ class Tier3Orchestrator:
         Returns:
             (merged_result, providers_used)
         """
+        return self._loop.run(self._ensemble_extract(text, doc_type, prompt_template))
+
+    async def aensemble_extract(self, text: str, doc_type: str,
+                                prompt_template: str) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Extract using ALL models in parallel without blocking the event loop.
+
+        Returns:
+            (merged_result, providers_used)
+        """
+        return await self._loop.submit(self._ensemble_extract(text, doc_type, prompt_template))
+
+    async def _ensemble_extract(self, text: str, doc_type: str,
+                                prompt_template: str) -> Tuple[Dict[str, Any], List[str]]:
         logger.info(f"🚀 ENSEMBLE EXTRACTION: Running {len(self.clients)} models in parallel")
 
         results = []
         providers_used = []
 
-        # Run all extractions in parallel
-        with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
-            future_to_provider = {
-                executor.submit(self._extract_single, text, doc_type, prompt_template, provider): provider
-                for provider in self.clients.keys()
-            }
+        # Render once; every provider gets the same prompt
+        prompt = render_prompt(prompt_template, text)
 
-            for future in as_completed(future_to_provider):
-                provider = future_to_provider[future]
-                try:
-                    result = future.result()
-                    if result and len(result) > 0:
-                        results.append(result)
-                        providers_used.append(provider)
-                        logger.info(f"  ✓ {provider}: {len(result)} fields extracted")
-                    else:
-                        logger.warning(f"  ✗ {provider}: No fields extracted")
-                except Exception as e:
-                    logger.error(f"  ✗ {provider}: {str(e)}")
+        # Run all extractions in parallel
+        async with aclosing(self._fanout(self._extract_prompt, prompt)) as outcomes:
+            async for provider, result in outcomes:
+                if isinstance(result, Exception):
+                    logger.error(f"  ✗ {provider}: {str(result)}")
+                elif result and len(result) > 0:
+                    results.append(result)
+                    providers_used.append(provider)
+                    logger.info(f"  ✓ {provider}: {len(result)} fields extracted")
+                    if len(results) < len(self.clients) and self._quorum_reached(results):
+                        # Leaving the loop cancels the providers still running
+                        logger.info(f"  ⚡ Quorum of {len(results)} reached, not waiting for the rest")
+                        break
+                else:
+                    logger.warning(f"  ✗ {provider}: No fields extracted")
 
         # Merge all results
         if not results:
             logger.error("❌ All models failed extraction")
             return {}, []
 
+        if len(results) == 1:
+            # Nothing to merge, and a lone model's answer teaches DSPy nothing
+            logger.info(f"✅ ENSEMBLE COMPLETE: Only {providers_used[0]} returned a result")
+            return results[0], providers_used
+
         merged = self.merger.merge_extractions(results)
         logger.info(f"✅ ENSEMBLE COMPLETE: Merged {len(results)} results from {providers_used}")
 
         # Store for DSPy learning
-        self.extraction_history.append({
-            'text': text,
-            'doc_type': doc_type,
-            'merged_result': merged,
-            'individual_results': results
-        })
+        self._record_history(text, doc_type, merged, results)
 
         return merged, providers_used
 
-    def _extract_single(self, text: str, doc_type: str, prompt_template: str, provider: str) -> Dict[str, Any]:
-        """Extract using a single provider"""
-        prompt = prompt_template.format(text=text)
+    def _quorum_reached(self, results: List[Dict[str, Any]]) -> bool:
+        """Whether the newest result agrees with enough earlier ones to make min_quorum"""
+        if len(results) < self.min_quorum:
+            return False
+        latest = results[-1]
+        agreeing = 1 + sum(_fields_agree(latest, earlier) for earlier in results[:-1])
+        return agreeing >= self.min_quorum
+
+    def ensemble_extract_batch(self, texts: List[str], doc_type: str, prompt_template: str,
+                               batch_size: int = 8) -> List[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Ensemble-extract many documents, packing up to batch_size of them into each prompt.
+
+        Every provider gets one call per batch instead of one per document; the
+        batches themselves run concurrently.
 
+        Args:
+            texts: Document texts (all of type doc_type)
+            doc_type: Document type
+            prompt_template: Extraction prompt template with a {text} placeholder
+            batch_size: Documents per prompt
+
+        Returns:
+            One (merged_result, providers_used) per text, in input order
+        """
+        return self._loop.run(self._ensemble_extract_batch(texts, doc_type, prompt_template, batch_size))
+
+    async def _ensemble_extract_batch(self, texts: List[str], doc_type: str, prompt_template: str,
+                                      batch_size: int) -> List[Tuple[Dict[str, Any], List[str]]]:
+        if not texts or not self.clients:
+            return [({}, []) for _ in texts]
+
+        starts = range(0, len(texts), batch_size)
+        logger.info(f"🚀 ENSEMBLE EXTRACTION: {len(texts)} documents in {len(starts)} batches "
+                    f"× {len(self.clients)} models")
+
+        found = await self._run_packed(self._extract_packed, texts, prompt_template, batch_size)
+
+        outputs = []
+        for text, doc_results in zip(texts, found):
+            doc_results = [(provider, row) for provider, row in doc_results if isinstance(row, dict) and row]
+            if not doc_results:
+                outputs.append(({}, []))
+                continue
+
+            results = [result for _, result in doc_results]
+            if len(results) == 1:
+                outputs.append((results[0], [doc_results[0][0]]))
+                continue
+
+            merged = self.merger.merge_extractions(results)
+            self._record_history(text, doc_type, merged, results)
+            outputs.append((merged, [provider for provider, _ in doc_results]))
+
+        logger.info(f"✅ ENSEMBLE COMPLETE: {sum(1 for merged, _ in outputs if merged)}/{len(texts)} documents extracted")
+        return outputs
+
+    async def _run_packed(self, fn, texts: List[str], prompt_template: str,
+                          batch_size: int) -> List[List[Tuple[str, Any]]]:
+        """
+        Send every batch of texts to every provider concurrently via fn.
+
+        Returns:
+            Per text, the (provider, row) pairs the providers returned for it
+        """
+        jobs = [(start, provider) for start in range(0, len(texts), batch_size) for provider in self.clients]
+        replies = await asyncio.gather(
+            *[fn(texts[start:start + batch_size], prompt_template, provider) for start, provider in jobs],
+            return_exceptions=True
+        )
+
+        found: List[List[Tuple[str, Any]]] = [[] for _ in texts]
+        for (start, provider), rows in zip(jobs, replies):
+            if isinstance(rows, BaseException):
+                logger.error(f"  ✗ {provider} (batch at {start}): {str(rows)}")
+                continue
+            for offset in range(min(batch_size, len(texts) - start)):
+                row = rows.get(str(offset))
+                if row is not None:
+                    found[start + offset].append((provider, row))
+        return found
+
+    async def _extract_packed(self, texts: List[str], prompt_template: str, provider: str) -> Dict[str, Any]:
+        """Extract several documents with one call; results keyed by document number ("0", "1", ...)"""
+        return await self._extract_prompt(_packed_prompt(prompt_template, texts), provider, documents=len(texts))
+
+    async def _extract_prompt(self, prompt: str, provider: str, documents: int = 1) -> Dict[str, Any]:
+        """Send a rendered extraction prompt covering the given number of documents, or reuse its reply"""
+        return await self._cached_call("extract", provider, prompt,
+                                       lambda: self._extract_call(prompt, provider, documents))
+
+    async def _extract_call(self, prompt: str, provider: str, documents: int) -> Dict[str, Any]:
         if provider == "openai":
             client = self.clients["openai"]["client"]
             model = self.clients["openai"]["model"]
 
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": "You are a precise data extraction specialist. Extract all fields accurately and respond only with valid JSON."},
@@ -290,49 +762,40 @@ class Tier3Orchestrator:
                 response_format={"type": "json_object"}
             )
 
-            return json.loads(response.choices[0].message.content)
+            return orjson.loads(response.choices[0].message.content)
 
         elif provider == "gemini":
             model = self.clients["gemini"]["client"]
 
-            generation_config = genai.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=2048,
-            )
-
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
+            generation_config = EXTRACT_GEN_CFG if documents == 1 else _gemini_config(2048 * documents)
 
-            response = model.generate_content(
+            response = await model.generate_content_async(
                 prompt,
                 generation_config=generation_config,
-                safety_settings=safety_settings
+                safety_settings=SAFETY_SETTINGS
             )
 
             if not response.candidates or not response.text:
                 raise ValueError("Response blocked by safety filters")
 
-            json_str = response.text[response.text.find('{'):response.text.rfind('}')+1]
-            return json.loads(json_str)
+            return _parse_json_reply(response.text)
 
         elif provider == "ollama":
             url = self.clients["ollama"]["url"]
             model = self.clients["ollama"]["model"]
 
-            response = requests.post(
+            response = await self._http.post(
                 f"{url}/api/generate",
-                json={"model": model, "prompt": prompt, "stream": False, "temperature": 0.1},
-                timeout=60
+                content=orjson.dumps({"model": model, "prompt": prompt, "stream": False,
+                                      "keep_alive": OLLAMA_KEEP_ALIVE,
+                                      "options": {"temperature": 0.1,
+                                                  "num_ctx": _ollama_num_ctx(prompt, 2048 * documents)}}),
+                headers={"Content-Type": "application/json"},
+                timeout=60 * documents
             )
 
-            response_text = response.json().get('response', '')
-            json_str = response_text[response_text.find('{'):response_text.rfind('}')+1]
-            return json.loads(json_str)
+            response_text = orjson.loads(response.content).get('response', '')
+            return _parse_json_reply(response_text)
 
         raise ValueError(f"Unknown provider: {provider}")
 
@@ -343,52 +806,130 @@ class Tier3Orchestrator:
         Returns:
             (doc_type, confidence, providers_used)
         """
+        return self._loop.run(self._classify_ensemble(text, prompt_template))
+
+    async def aclassify_ensemble(self, text: str, prompt_template: str) -> Tuple[str, float, List[str]]:
+        """
+        Classify using ensemble approach without blocking the event loop.
+
+        Returns:
+            (doc_type, confidence, providers_used)
+        """
+        return await self._loop.submit(self._classify_ensemble(text, prompt_template))
+
+    async def _classify_ensemble(self, text: str, prompt_template: str) -> Tuple[str, float, List[str]]:
         logger.info(f"🚀 ENSEMBLE CLASSIFICATION: Running {len(self.clients)} models in parallel")
 
         classifications = []
         providers_used = []
+        votes = Counter()
 
-        # Run all classifications in parallel
-        with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
-            future_to_provider = {
-                executor.submit(self._classify_single, text, prompt_template, provider): provider
-                for provider in self.clients.keys()
-            }
+        # Truncate to each provider's token budget, rendering each distinct prompt once
+        rendered: Dict[int, str] = {}
+        prompts = {}
+        for provider in self.clients:
+            max_tokens = _CLASSIFY_MAX_TOKENS[provider]
+            if max_tokens not in rendered:
+                rendered[max_tokens] = render_prompt(prompt_template, truncate_tokens(text, max_tokens, OPENAI_MODEL))
+            prompts[provider] = rendered[max_tokens]
 
-            for future in as_completed(future_to_provider):
-                provider = future_to_provider[future]
+        # Run all classifications in parallel
+        async with aclosing(self._fanout(lambda provider: self._classify_prompt(prompts[provider], provider))) as outcomes:
+            async for provider, result in outcomes:
                 try:
-                    doc_type, confidence = future.result()
-                    classifications.append((doc_type, confidence))
-                    providers_used.append(provider)
-                    logger.info(f"  ✓ {provider}: {doc_type} ({confidence:.1%})")
+                    if isinstance(result, Exception):
+                        raise result
+                    doc_type, confidence = result.get("type", "unknown"), float(result.get("confidence", 0.5))
                 except Exception as e:
                     logger.error(f"  ✗ {provider}: {str(e)}")
+                    continue
+                classifications.append((doc_type, confidence))
+                providers_used.append(provider)
+                logger.info(f"  ✓ {provider}: {doc_type} ({confidence:.1%})")
+                votes[doc_type] += 1
+                if len(classifications) < len(self.clients) and votes[doc_type] * 2 > len(self.clients):
+                    # A majority of all providers agrees; the rest can't change the vote
+                    logger.info(f"  ⚡ Majority for {doc_type}, not waiting for the rest")
+                    break
 
         # Voting: most common classification
         if not classifications:
             return "unknown", 0.0, []
 
+        most_common_type, avg_confidence = self._vote(classifications)
+        logger.info(f"✅ ENSEMBLE VOTE: {most_common_type} ({avg_confidence:.1%})")
+
+        return most_common_type, avg_confidence, providers_used
+
+    @staticmethod
+    def _vote(classifications: List[Tuple[str, float]]) -> Tuple[str, float]:
+        """Most common doc_type across providers, with the average confidence"""
+        if len(classifications) == 1:
+            return classifications[0]
+
         doc_types = [c[0] for c in classifications]
         confidences = [c[1] for c in classifications]
 
         counter = Counter(doc_types)
-        most_common_type = counter.most_common(1)[0][0]
-        avg_confidence = sum(confidences) / len(confidences)
+        return counter.most_common(1)[0][0], sum(confidences) / len(confidences)
 
-        logger.info(f"✅ ENSEMBLE VOTE: {most_common_type} ({avg_confidence:.1%})")
+    def classify_ensemble_batch(self, texts: List[str], prompt_template: str,
+                                batch_size: int = 8) -> List[Tuple[str, float, List[str]]]:
+        """
+        Ensemble-classify many documents, packing up to batch_size of them into each prompt.
 
-        return most_common_type, avg_confidence, providers_used
+        Returns:
+            One (doc_type, confidence, providers_used) per text, in input order
+        """
+        return self._loop.run(self._classify_ensemble_batch(texts, prompt_template, batch_size))
+
+    async def _classify_ensemble_batch(self, texts: List[str], prompt_template: str,
+                                       batch_size: int) -> List[Tuple[str, float, List[str]]]:
+        if not texts or not self.clients:
+            return [("unknown", 0.0, []) for _ in texts]
 
-    def _classify_single(self, text: str, prompt_template: str, provider: str) -> Tuple[str, float]:
-        """Classify using a single provider"""
-        prompt = prompt_template.format(text=text[:3000])
+        starts = range(0, len(texts), batch_size)
+        logger.info(f"🚀 ENSEMBLE CLASSIFICATION: {len(texts)} documents in {len(starts)} batches "
+                    f"× {len(self.clients)} models")
 
+        found = await self._run_packed(self._classify_packed, texts, prompt_template, batch_size)
+
+        outputs = []
+        for doc_results in found:
+            classifications = []
+            for provider, row in doc_results:
+                if not isinstance(row, dict):
+                    continue
+                try:
+                    confidence = float(row.get("confidence", 0.5))
+                except (TypeError, ValueError):
+                    # One bad row only costs this provider's vote for this document
+                    logger.error(f"  ✗ {provider}: invalid confidence {row.get('confidence')!r}")
+                    continue
+                classifications.append((provider, (row.get("type", "unknown"), confidence)))
+            if not classifications:
+                outputs.append(("unknown", 0.0, []))
+                continue
+            doc_type, confidence = self._vote([classification for _, classification in classifications])
+            outputs.append((doc_type, confidence, [provider for provider, _ in classifications]))
+        return outputs
+
+    async def _classify_packed(self, texts: List[str], prompt_template: str, provider: str) -> Dict[str, Any]:
+        """Classify several documents with one call; results keyed by document number ("0", "1", ...)"""
+        texts = [truncate_tokens(text, _CLASSIFY_MAX_TOKENS[provider], OPENAI_MODEL) for text in texts]
+        return await self._classify_prompt(_packed_prompt(prompt_template, texts), provider, documents=len(texts))
+
+    async def _classify_prompt(self, prompt: str, provider: str, documents: int = 1) -> Dict[str, Any]:
+        """Send a rendered classification prompt covering the given number of documents, or reuse its reply"""
+        return await self._cached_call("classify", provider, prompt,
+                                       lambda: self._classify_call(prompt, provider, documents))
+
+    async def _classify_call(self, prompt: str, provider: str, documents: int) -> Dict[str, Any]:
         if provider == "openai":
             client = self.clients["openai"]["client"]
             model = self.clients["openai"]["model"]
 
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": "You are a document classifier. Respond only with valid JSON."},
@@ -398,44 +939,38 @@ class Tier3Orchestrator:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
-            return result.get("type", "unknown"), float(result.get("confidence", 0.5))
+            return orjson.loads(response.choices[0].message.content)
 
         elif provider == "gemini":
             model = self.clients["gemini"]["client"]
 
-            generation_config = genai.GenerationConfig(temperature=0.1, max_output_tokens=512)
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
+            generation_config = CLASSIFY_GEN_CFG if documents == 1 else _gemini_config(512 * documents)
 
-            response = model.generate_content(prompt, generation_config=generation_config, safety_settings=safety_settings)
+            response = await model.generate_content_async(prompt, generation_config=generation_config,
+                                                          safety_settings=SAFETY_SETTINGS)
 
             if not response.candidates or not response.text:
                 raise ValueError("Response blocked")
 
-            json_str = response.text[response.text.find('{'):response.text.rfind('}')+1]
-            result = json.loads(json_str)
-            return result.get("type", "unknown"), float(result.get("confidence", 0.5))
+            return _parse_json_reply(response.text)
 
         elif provider == "ollama":
             url = self.clients["ollama"]["url"]
             model = self.clients["ollama"]["model"]
 
-            response = requests.post(
+            num_predict = OLLAMA_CLASSIFY_OPTIONS["num_predict"] * documents
+            response = await self._http.post(
                 f"{url}/api/generate",
-                json={"model": model, "prompt": prompt, "stream": False, "temperature": 0.1},
-                timeout=30
+                content=orjson.dumps({"model": model, "prompt": prompt, "stream": False,
+                                      "keep_alive": OLLAMA_KEEP_ALIVE,
+                                      "options": {**OLLAMA_CLASSIFY_OPTIONS, "num_predict": num_predict,
+                                                  "num_ctx": _ollama_num_ctx(prompt, num_predict)}}),
+                headers={"Content-Type": "application/json"},
+                timeout=30 * documents
             )
 
-            response_text = response.json().get('response', '')
-            json_str = response_text[response_text.find('{'):response_text.rfind('}')+1]
-            result = json.loads(json_str)
-            return result.get("type", "unknown"), float(result.get("confidence", 0.5))
+            response_text = orjson.loads(response.content).get('response', '')
+            return _parse_json_reply(response_text)
 
         raise ValueError(f"Unknown provider: {provider}")
 
@@ -443,16 +978,13 @@ class Tier3Orchestrator:
         """
         Use DSPy to optimize prompts based on extraction history.
         """
-        if len(self.extraction_history) < 3:
+        # Prepare training examples from successful extractions, streamed from disk
+        successful = (item for item in self.iter_history(doc_type) if item['merged_result'])
+        examples = [(item['text'], item['merged_result']) for item in islice(successful, _MAX_DSPY_EXAMPLES)]
+
+        if len(examples) < 3:
             logger.info("Not enough history for DSPy optimization yet")
             return
 
-        # Prepare training examples from successful extractions
-        examples = []
-        for item in self.extraction_history:
-            if item['doc_type'] == doc_type and item['merged_result']:
-                examples.append((item['text'], item['merged_result']))
-
-        if examples:
-            logger.info(f"🧠 DSPy: Optimizing prompts with {len(examples)} examples")
-            self.dspy_optimizer.optimize_extraction(examples, doc_type)
+        logger.info(f"🧠 DSPy: Optimizing prompts with {len(examples)} examples")
+        self.dspy_optimizer.optimize_extraction(examples, doc_type)
@@ -0,0 +1,44 @@
+"""
+Helpers for pulling structured data out of free-form LLM responses.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import orjson
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the JSON object that starts at the first '{' in text.
+
+    Decodes in place from that brace, so surrounding prose, markdown fences,
+    trailing objects and braces inside string values are all handled. Later
+    braces are never tried on their own: if the outer object is malformed or
+    truncated, a nested object (e.g. one line item) would decode and be
+    mistaken for the whole reply.
+
+    Args:
+        text: Raw LLM response text
+
+    Returns:
+        The parsed object, or None if the object at the first '{' isn't valid JSON
+    """
+    # Fast path: the whole response is a bare JSON object
+    stripped = text.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            return orjson.loads(stripped)
+        except orjson.JSONDecodeError:
+            pass
+
+    idx = text.find('{')
+    if idx == -1:
+        return None
+    try:
+        obj, _ = _decoder.raw_decode(text, idx)
+    except json.JSONDecodeError:
+        return None
+    return obj
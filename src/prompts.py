@@ -0,0 +1,153 @@
+"""
+Prompt template loading shared by the classifiers and extractors.
+"""
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+from string import Formatter
+from typing import Dict, Optional, Tuple
+
+# Optional exact token counts for prompt truncation
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLASSIFICATION_PROMPT_FILE = 'prompts/classification.txt'
+
+EXTRACTION_PROMPT_FILES = {
+    'invoice': 'prompts/invoice_extraction.txt',
+    'contract': 'prompts/contract_extraction.txt',
+    'email': 'prompts/email_extraction.txt',
+    'meeting_minutes': 'prompts/meeting_extraction.txt'
+}
+
+# Rough English average, used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+# Generous upper bound, so long documents aren't tokenized in full just to be cut
+_MAX_CHARS_PER_TOKEN = 16
+
+
+@lru_cache(maxsize=None)
+def load_prompt_file(file_path: str) -> Optional[str]:
+    """
+    Read a prompt template from disk, once per process.
+
+    Args:
+        file_path: Path to the template file
+
+    Returns:
+        Template text, or None if the file doesn't exist
+    """
+    try:
+        with open(Path(file_path), 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def load_extraction_prompt_files() -> Dict[str, Optional[str]]:
+    """
+    Read all extraction prompt templates, once per process.
+
+    Returns:
+        Mapping of document type to template text (None where the file is missing)
+    """
+    return {doc_type: load_prompt_file(file_path) for doc_type, file_path in EXTRACTION_PROMPT_FILES.items()}
+
+
+@lru_cache(maxsize=64)
+def split_template(template: str) -> Tuple[str, ...]:
+    """
+    Split a template on its {text} fields, unescaping {{ and }} once.
+
+    Args:
+        template: str.format-style template whose only field is {text}
+
+    Returns:
+        Literal chunks to be joined with the document text
+    """
+    chunks = []
+    literal = []
+    for literal_text, field_name, _, _ in Formatter().parse(template):
+        literal.append(literal_text)
+        if field_name is None:
+            continue
+        if field_name != 'text':
+            raise ValueError(f"Unsupported prompt template field: {{{field_name}}}")
+        chunks.append(''.join(literal))
+        literal = []
+    chunks.append(''.join(literal))
+    return tuple(chunks)
+
+
+def render_prompt(template: str, text: str) -> str:
+    """Equivalent to template.format(text=text) without re-parsing the template"""
+    return text.join(split_template(template))
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """
+    tiktoken encoding for model, or None if tiktoken or its BPE file isn't
+    available (logged once per model, since token budgets then become estimates)
+    """
+    if not TIKTOKEN_AVAILABLE:
+        logger.warning(f"tiktoken not installed; estimating {model} tokens at "
+                       f"{_CHARS_PER_TOKEN} characters each")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # Unknown model, or no network to fetch the encoding on first use
+        logger.warning(f"No tiktoken encoding for {model} ({e}); estimating tokens at "
+                       f"{_CHARS_PER_TOKEN} characters each")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count the tokens in text.
+
+    Args:
+        text: Text to measure
+        model: Model whose tokenizer to count with (an approximation for
+            non-OpenAI providers)
+
+    Returns:
+        Token count (approximated as 4 characters per token when tiktoken
+        is unavailable)
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Cut text to at most max_tokens tokens.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+        model: Model whose tokenizer to count with (an approximation for
+            non-OpenAI providers)
+
+    Returns:
+        The leading part of text that fits the budget (approximated as
+        4 characters per token when tiktoken is unavailable)
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+
+    head = text[:max_tokens * _MAX_CHARS_PER_TOKEN]
+    tokens = encoding.encode(head, disallowed_special=())
+    return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else head
@@ -102,6 +102,14 @@ DOCUMENT_TYPE_MAP = {
 }
 
 
+# Every document field across all types, in schema order (the master CSV's columns)
+SCHEMA_FIELDS = list(dict.fromkeys(
+    field
+    for document_class in (BaseDocument, *DOCUMENT_TYPE_MAP.values())
+    for field in document_class.model_fields
+))
+
+
 def create_document(doc_type: DocumentType, **kwargs) -> BaseDocument:
     """Factory function to create the appropriate document type"""
     document_class = DOCUMENT_TYPE_MAP.get(doc_type, BaseDocument)
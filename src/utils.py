@@ -2,20 +2,49 @@
 Utility functions for the document intelligence pipeline.
 """
 
-import json
+import csv
+import hashlib
+import orjson
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from statistics import fmean
+from typing import List, Dict, Any, Tuple
 import logging
 
+from .schemas import SCHEMA_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _write_json(file_path: Path, doc_dict: Dict[str, Any]) -> Path:
+    file_path.write_bytes(
+        orjson.dumps(doc_dict, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY, default=str)
+    )
+    return file_path
+
+
+def _json_path(output_path: Path, doc_dict: Dict[str, Any]) -> Path:
+    """JSON file for a document, named from its type and ID"""
+    doc_id = doc_dict.get('document_id', 'unknown')
+    doc_type = doc_dict.get('document_type', 'unknown')
+    return output_path / f"{doc_type}_{doc_id[:8]}.json"
+
+
 def save_to_json(documents: List[Any], output_dir: str = "data/output/json"):
     """
     Save documents to individual JSON files.
 
+    Files are written from a small thread pool so their I/O overlaps.
+
     Args:
         documents: List of document objects
         output_dir: Directory to save JSON files
@@ -23,6 +52,8 @@ def save_to_json(documents: List[Any], output_dir: str = "data/output/json"):
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    file_paths = []
+    doc_dicts = []
     for doc in documents:
         # Convert Pydantic model to dict
         if hasattr(doc, 'dict'):
@@ -30,50 +61,159 @@ def save_to_json(documents: List[Any], output_dir: str = "data/output/json"):
         else:
             doc_dict = doc
 
-        # Create filename from document type and ID
-        doc_id = doc_dict.get('document_id', 'unknown')
-        doc_type = doc_dict.get('document_type', 'unknown')
-        filename = f"{doc_type}_{doc_id[:8]}.json"
+        file_paths.append(_json_path(output_path, doc_dict))
+        doc_dicts.append(doc_dict)
 
-        file_path = output_path / filename
+    if doc_dicts:
+        with ThreadPoolExecutor(max_workers=min(16, len(doc_dicts))) as executor:
+            for file_path in executor.map(_write_json, file_paths, doc_dicts):
+                logger.info(f"Saved: {file_path.name}")
 
-        with open(file_path, 'w') as f:
-            json.dump(doc_dict, f, indent=2, default=str)
+    logger.info(f"Saved {len(documents)} documents to {output_dir}")
 
-        logger.info(f"Saved: {filename}")
 
-    logger.info(f"Saved {len(documents)} documents to {output_dir}")
+# The master CSV's columns, whichever writer produces it
+_CSV_FIELDS = frozenset(SCHEMA_FIELDS)
+
+
+def _row(document: Any) -> Dict[str, Any]:
+    """A document as one master CSV row (nested dicts flattened, lists as JSON strings)"""
+    return flatten_dict(document.dict() if hasattr(document, 'dict') else document)
+
+
+def _csv_writer(file) -> csv.DictWriter:
+    """Master CSV writer: one column per schema field, in schema order"""
+    return csv.DictWriter(file, fieldnames=SCHEMA_FIELDS, extrasaction='ignore')
+
+
+def _warn_dropped(row: Dict[str, Any], reported: set):
+    """Log (once per key) row keys the master CSV has no column for"""
+    dropped = row.keys() - _CSV_FIELDS - reported
+    if dropped:
+        reported.update(dropped)
+        logger.warning(f"Master CSV has no column for {', '.join(sorted(dropped))}; dropping it")
 
 
 def save_to_csv(documents: List[Any], output_file: str = "data/output/master_data.csv"):
     """
     Save documents to a single CSV file.
 
+    Rows and columns match the ones DocumentWriter streams, so the file has
+    the same layout whichever script wrote it.
+
     Args:
         documents: List of document objects
-        output_file: Path to output CSV file
+        output_file: Path to output CSV file (columns: every schema field)
+
+    Returns:
+        DataFrame of the rows written
     """
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Convert documents to list of dicts
-    records = []
-    for doc in documents:
-        if hasattr(doc, 'dict'):
-            doc_dict = doc.dict()
-        else:
-            doc_dict = doc
+    rows = [_row(doc) for doc in documents]
+    reported = set()
+    for row in rows:
+        _warn_dropped(row, reported)
 
-        # Flatten nested structures for CSV
-        flattened = flatten_dict(doc_dict)
-        records.append(flattened)
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = _csv_writer(f)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    logger.info(f"Saved {len(documents)} documents to {output_file}")
+    return pd.DataFrame(rows, columns=SCHEMA_FIELDS)
+
+
+def save_to_parquet(documents: List[Any], output_file: str = "data/output/master_data.parquet",
+                    row_group_size: int = 1024):
+    """
+    Save documents to a single Parquet file (requires pyarrow).
 
-    # Create DataFrame and save
-    df = pd.DataFrame(records)
-    df.to_csv(output_path, index=False)
+    Columns are built once per schema field and encoded by Arrow's C++ writer,
+    keeping nested fields (metadata, line items) as structs and lists rather
+    than JSON strings. The file is much smaller than the CSV and loads
+    straight back with pd.read_parquet.
+
+    Args:
+        documents: List of document objects
+        output_file: Path to output Parquet file
+        row_group_size: Rows per Parquet row group
+
+    Returns:
+        Path to the Parquet file, or None if pyarrow isn't installed
+    """
+    if not PYARROW_AVAILABLE:
+        logger.warning("pyarrow not installed; skipping Parquet output")
+        return None
+
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # JSON mode turns dates and enums into plain values Arrow can type
+    docs_as_dicts = [
+        doc.model_dump(mode='json') if hasattr(doc, 'model_dump') else doc
+        for doc in documents
+    ]
+    # Build column by column so every document type's fields are kept
+    # (from_pylist would take its columns from the first row only)
+    table = pa.table({
+        field: [doc_dict.get(field) for doc_dict in docs_as_dicts]
+        for field in SCHEMA_FIELDS
+    })
+    pq.write_table(table, output_path, row_group_size=row_group_size)
 
     logger.info(f"Saved {len(documents)} documents to {output_file}")
-    return df
+    return output_path
+
+
+class DocumentWriter:
+    """
+    Writes each document to its JSON file and a row of the master CSV as soon
+    as it's produced, instead of buffering a whole batch for save_to_json and
+    save_to_csv. Use as a context manager.
+    """
+
+    def __init__(self, output_dir: str = "data/output/json",
+                 output_file: str = "data/output/master_data.csv"):
+        """
+        Args:
+            output_dir: Directory to save JSON files
+            output_file: Path to output CSV file (same layout as save_to_csv)
+        """
+        self.output_path = Path(output_dir)
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        csv_path = Path(output_file)
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._csv = open(csv_path, 'w', newline='', encoding='utf-8')
+        self._writer = _csv_writer(self._csv)
+        self._writer.writeheader()
+        self._dropped = set()
+        self.count = 0
+
+    def write(self, doc: Any) -> Path:
+        """Save one document; returns its JSON file"""
+        doc_dict = doc.dict() if hasattr(doc, 'dict') else doc
+        file_path = _write_json(_json_path(self.output_path, doc_dict), doc_dict)
+        row = _row(doc_dict)
+        _warn_dropped(row, self._dropped)
+        self._writer.writerow(row)
+        # Rows already written survive a crash later in the run
+        self._csv.flush()
+        self.count += 1
+        logger.info(f"Saved: {file_path.name}")
+        return file_path
+
+    def close(self):
+        self._csv.close()
+        logger.info(f"Saved {self.count} documents to {self.output_path} and {self._csv.name}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 def flatten_dict(d: Dict, parent_key: str = '', sep: str = '_') -> Dict:
@@ -82,25 +222,64 @@ def flatten_dict(d: Dict, parent_key: str = '', sep: str = '_') -> Dict:
 
     Args:
         d: Dictionary to flatten
-        parent_key: Parent key for recursion
+        parent_key: Prefix for every flattened key
         sep: Separator for nested keys
 
     Returns:
-        Flattened dictionary
+        Flattened dictionary, keys in the same depth-first order as d
     """
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
-        elif isinstance(v, list):
-            # Convert lists to JSON strings for CSV compatibility
-            items.append((new_key, json.dumps(v)))
+    flat = {}
+    # Walk with an explicit stack of (key prefix, remaining items) instead of
+    # recursing and merging a dict per nesting level
+    stack = [(parent_key, iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+
+            if isinstance(v, dict):
+                stack.append((new_key, iter(v.items())))
+                break
+            elif isinstance(v, list):
+                # Convert lists to JSON strings for CSV compatibility
+                flat[new_key] = orjson.dumps(v, default=str).decode()
+            else:
+                flat[new_key] = v
         else:
-            items.append((new_key, v))
+            stack.pop()
+
+    return flat
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a document's text, identifying copies of the same file"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def dedupe_documents(documents: List[Dict]) -> Tuple[List[Dict], List[int]]:
+    """
+    Collapse ingested documents with identical text, so each distinct document
+    is sent to the LLMs once.
+
+    Args:
+        documents: Ingested documents (dicts with 'text')
+
+    Returns:
+        (distinct documents in first-seen order, index into them for every input document)
+    """
+    first_seen: Dict[str, int] = {}
+    unique = []
+    owners = []
+    for doc in documents:
+        key = content_hash(doc['text'])
+        if key not in first_seen:
+            first_seen[key] = len(unique)
+            unique.append(doc)
+        owners.append(first_seen[key])
 
-    return dict(items)
+    if len(unique) < len(documents):
+        logger.info(f"{len(documents) - len(unique)} duplicate document(s) will reuse another copy's results")
+    return unique, owners
 
 
 def load_documents_from_json(json_dir: str = "data/output/json") -> List[Dict]:
@@ -121,9 +300,7 @@ def load_documents_from_json(json_dir: str = "data/output/json") -> List[Dict]:
 
     documents = []
     for json_file in json_path.glob("*.json"):
-        with open(json_file, 'r') as f:
-            doc = json.load(f)
-            documents.append(doc)
+        documents.append(orjson.loads(json_file.read_bytes()))
 
     logger.info(f"Loaded {len(documents)} documents from {json_dir}")
     return documents
@@ -157,8 +334,7 @@ def create_summary_report(documents: List[Any]) -> Dict[str, Any]:
         type_counts[doc_type] = type_counts.get(doc_type, 0) + 1
 
     # Calculate average confidence
-    confidences = [doc.get('confidence_score', 0) for doc in docs_list]
-    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+    avg_confidence = fmean(doc.get('confidence_score', 0) for doc in docs_list) if docs_list else 0
 
     # Extract financial data
     total_amounts = []
@@ -3,19 +3,25 @@
 Test script for orchestrated multi-model document intelligence pipeline.
 """
 
+import os
 import sys
+from collections import defaultdict
 from pathlib import Path
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent))
 
 from src.ingestion import DocumentIngestor
+from src.orchestrator import LLMOrchestrator, start_queue_logging
 from src.classifier_orchestrated import DocumentClassifier
 from src.extractor_orchestrated import FieldExtractor
 from src.schemas import DocumentType, create_document
-from src.utils import save_to_json, save_to_csv
+from src.utils import save_to_json, save_to_csv, save_to_parquet, dedupe_documents
 
 def main():
+    # Provider calls hand log records to a listener thread instead of writing them
+    start_queue_logging()
+
     print("=" * 80)
     print("MULTI-MODEL ORCHESTRATED DOCUMENT INTELLIGENCE PIPELINE")
     print("=" * 80)
@@ -23,11 +29,14 @@ def main():
     # Step 1: Initialize
     print("\n1. Initializing multi-model orchestrator...")
     print("   Available models: OpenAI GPT-4o, Gemini 2.5 Flash, Ollama Qwen")
+    # One orchestrator (clients + connection pool) shared by classifier and extractor
+    orchestrator = LLMOrchestrator()
     print("   ✓ Orchestrator ready\n")
 
     # Step 2: Ingest documents
     print("2. Ingesting documents with OCR...")
-    ingestor = DocumentIngestor()
+    # One ingest process per core; each PDF is parsed independently
+    ingestor = DocumentIngestor(max_workers=os.cpu_count())
     documents = ingestor.batch_ingest("data/input")
 
     if not documents:
@@ -38,46 +47,66 @@ def main():
 
     # Step 3: Classify documents
     print("3. Classifying documents (with automatic fallback)...")
-    classifier = DocumentClassifier()
+    classifier = DocumentClassifier(orchestrator=orchestrator)
+
+    # Copies of the same file are classified and extracted once
+    unique_documents, owners = dedupe_documents(documents)
+    unique_results = [classifier.classify(doc['text']) for doc in unique_documents]
 
     classifications = []
-    for doc in documents:
-        doc_type, confidence = classifier.classify(doc['text'])
+    for doc, owner in zip(documents, owners):
+        doc_type, confidence = unique_results[owner]
         classifications.append({
             'document': doc,
             'type': doc_type,
-            'confidence': confidence
+            'confidence': confidence,
+            'owner': owner
         })
         print(f"   {doc['metadata']['file_name']}: {doc_type} ({confidence:.1%})")
 
     # Step 4: Extract fields
     print("\n4. Extracting fields (with validation)...")
-    extractor = FieldExtractor()
+    extractor = FieldExtractor(orchestrator=orchestrator)
 
-    extracted_documents = []
+    # One batched call per document type, so same-type prompts go out together
+    by_type = defaultdict(list)
     for item in classifications:
-        doc = item['document']
-        doc_type = item['type']
-        confidence = item['confidence']
-
-        extracted_fields = extractor.extract(doc['text'], doc_type)
-
-        try:
-            document_obj = create_document(
-                doc_type=DocumentType(doc_type),
-                file_name=doc['metadata']['file_name'],
-                confidence_score=confidence,
-                **extracted_fields
+        by_type[item['type']].append(item)
+
+    extracted_documents = []
+    for doc_type, items in by_type.items():
+        prompt_template = extractor.prompts.get(doc_type)
+        # One extraction per distinct document, shared by its copies
+        owners_of_type = list(dict.fromkeys(item['owner'] for item in items))
+        if prompt_template:
+            unique_fields, _, _ = orchestrator.extract_batch(
+                [(unique_documents[owner]['text'], doc_type, prompt_template) for owner in owners_of_type]
             )
-            extracted_documents.append(document_obj)
-            print(f"   ✓ Extracted from {doc['metadata']['file_name']}")
-        except Exception as e:
-            print(f"   ⚠️  Error: {str(e)}")
+        else:
+            unique_fields = [{} for _ in owners_of_type]
+        fields_by_owner = dict(zip(owners_of_type, unique_fields))
+        results = [fields_by_owner[item['owner']] for item in items]
+
+        for item, extracted_fields in zip(items, results):
+            doc = item['document']
+            try:
+                document_obj = create_document(
+                    doc_type=DocumentType(doc_type),
+                    file_name=doc['metadata']['file_name'],
+                    confidence_score=item['confidence'],
+                    **extracted_fields
+                )
+                extracted_documents.append(document_obj)
+                print(f"   ✓ Extracted from {doc['metadata']['file_name']}")
+            except Exception as e:
+                print(f"   ⚠️  Error: {str(e)}")
 
     # Step 5: Save results
     print("\n5. Saving results...")
     save_to_json(extracted_documents)
     save_to_csv(extracted_documents)
+    save_to_parquet(extracted_documents)
+    orchestrator.close()
 
     print("\n" + "=" * 80)
     print(f"✅ SUCCESS! Processed {len(extracted_documents)} documents")
@@ -85,6 +114,7 @@ def main():
     print("\nOutput files:")
     print("  - data/output/json/*.json")
     print("  - data/output/master_data.csv")
+    print("  - data/output/master_data.parquet (if pyarrow is installed)")
     print("=" * 80)
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+"""
+Tests for merging several providers' extractions into one result.
+"""
+
+import unittest
+
+from src.orchestrator_tier3 import FieldMerger
+
+
+class FieldMergerTest(unittest.TestCase):
+
+    def test_list_union_keeps_first_seen_order(self):
+        merged = FieldMerger.merge_extractions([
+            {"parties": ["Acme", "Globex"]},
+            {"parties": ["Initech", "Acme"]},
+        ])
+        self.assertEqual(merged["parties"], ["Acme", "Globex", "Initech"])
+
+    def test_dict_items_deduplicated_in_order(self):
+        # Same line item with its keys in a different order counts once
+        merged = FieldMerger.merge_extractions([
+            {"line_items": [{"description": "x", "amount": 5}, {"description": "y", "amount": 2}]},
+            {"line_items": [{"amount": 5, "description": "x"}, {"description": "z", "amount": 1}]},
+        ])
+        self.assertEqual(merged["line_items"], [
+            {"description": "x", "amount": 5},
+            {"description": "y", "amount": 2},
+            {"description": "z", "amount": 1},
+        ])
+
+    def test_dict_valued_field_takes_first_value(self):
+        merged = FieldMerger.merge_extractions([
+            {"address": {"city": "Paris"}},
+            {"address": {"city": "Lyon"}},
+        ])
+        self.assertEqual(merged["address"], {"city": "Paris"})
+
+    def test_scalars_vote_and_average(self):
+        merged = FieldMerger.merge_extractions([
+            {"vendor_name": "Acme", "total_amount": 10, "currency": None},
+            {"vendor_name": "Acme", "total_amount": 20, "currency": None},
+            {"vendor_name": "Acme Inc", "total_amount": 30, "currency": None},
+        ])
+        self.assertEqual(merged["vendor_name"], "Acme")
+        self.assertEqual(merged["total_amount"], 20)
+        self.assertIsNone(merged["currency"])
+
+
+if __name__ == "__main__":
+    unittest.main()
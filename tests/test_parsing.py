@@ -0,0 +1,31 @@
+"""
+Tests for pulling JSON objects out of LLM responses.
+"""
+
+import unittest
+
+from src.parsing import extract_json
+
+
+class ExtractJsonTest(unittest.TestCase):
+
+    def test_bare_object(self):
+        self.assertEqual(extract_json('{"type": "invoice", "confidence": 0.9}'),
+                         {"type": "invoice", "confidence": 0.9})
+
+    def test_object_in_prose_and_fences(self):
+        text = 'Here you go:\n```json\n{"type": "receipt", "note": "a {brace}"}\n```\nThanks {x}'
+        self.assertEqual(extract_json(text), {"type": "receipt", "note": "a {brace}"})
+
+    def test_truncated_nested_reply_returns_none(self):
+        # The first line item is valid JSON on its own and must not be returned
+        text = ('{"invoice_number": "A1", "line_items": [{"description": "x", "amount": 5}, '
+                '{"description": "y"')
+        self.assertIsNone(extract_json(text))
+
+    def test_no_object(self):
+        self.assertIsNone(extract_json("no json here"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests that the tier 3 ensemble calls its providers concurrently.
+"""
+
+import asyncio
+import time
+import unittest
+from collections import OrderedDict
+
+from src.orchestrator_tier3 import FieldMerger, Tier3Orchestrator
+
+PROVIDERS = ("openai", "gemini", "ollama")
+LATENCY = 0.2
+
+
+def make_orchestrator():
+    """Tier3Orchestrator with mocked providers that each take LATENCY seconds"""
+    orchestrator = Tier3Orchestrator.__new__(Tier3Orchestrator)
+    orchestrator.clients = {provider: {"model": provider} for provider in PROVIDERS}
+    orchestrator.merger = FieldMerger()
+    orchestrator.min_quorum = len(PROVIDERS) + 1
+    orchestrator.cache = None
+    orchestrator.cache_hits = 0
+    orchestrator._cache = OrderedDict()
+    orchestrator._semaphore = asyncio.Semaphore(len(PROVIDERS))
+    orchestrator._provider_slots = {provider: asyncio.Semaphore(1) for provider in PROVIDERS}
+    orchestrator.limits = {provider: asyncio.Semaphore(1) for provider in PROVIDERS}
+    orchestrator._record_history = lambda *args: None
+
+    async def _extract_call(prompt, provider, documents):
+        await asyncio.sleep(LATENCY)
+        return {"source": provider}
+
+    async def _classify_call(prompt, provider, documents):
+        await asyncio.sleep(LATENCY)
+        # Every provider disagrees, so no majority ends the wait early
+        return {"type": provider, "confidence": 0.9}
+
+    orchestrator._extract_call = _extract_call
+    orchestrator._classify_call = _classify_call
+    return orchestrator
+
+
+class FanoutTest(unittest.TestCase):
+
+    def test_extraction_runs_providers_concurrently(self):
+        orchestrator = make_orchestrator()
+        start = time.perf_counter()
+        _, providers = asyncio.run(orchestrator._ensemble_extract("text", "invoice", "{text}"))
+        elapsed = time.perf_counter() - start
+
+        self.assertCountEqual(providers, PROVIDERS)
+        self.assertLess(elapsed, LATENCY * len(PROVIDERS) * 0.75)
+
+    def test_classification_runs_providers_concurrently(self):
+        orchestrator = make_orchestrator()
+        start = time.perf_counter()
+        _, _, providers = asyncio.run(orchestrator._classify_ensemble("text", "{text}"))
+        elapsed = time.perf_counter() - start
+
+        self.assertCountEqual(providers, PROVIDERS)
+        self.assertLess(elapsed, LATENCY * len(PROVIDERS) * 0.75)
+
+
+if __name__ == "__main__":
+    unittest.main()